@@ -0,0 +1,77 @@
+"""
+Command line entry point:
+
+    python -m post_euclid --mode instanced --tiling 4,6 --layers 8
+
+Only argparse is imported before the arguments are parsed, so --help and argument errors return at once.
+pyglet, numpy and the geometry modules are imported afterwards, and of those only what the selected model
+and mode use.
+"""
+import time
+
+_start_time = time.perf_counter()
+
+import argparse
+import sys
+import typing
+
+
+def _parse_tiling(value: str) -> typing.Tuple[int, int]:
+    try:
+        p, q = (int(v) for v in value.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected p,q e.g. 4,6")
+
+    # imports numpy, but only once a tiling is given
+    from post_euclid.hyperbolic_2d.tiling import check_hyperbolic
+
+    try:
+        check_hyperbolic(p, q)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+    return p, q
+
+
+def parse_args(argv: typing.Optional[typing.Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m post_euclid", description="Hyperbolic tiling viewer")
+    parser.add_argument("--model", choices=("poincare", "weierstrass"), default="poincare")
+    parser.add_argument("--tiling", type=_parse_tiling, default=(4, 6), help="p,q of the {p, q} tiling")
+    parser.add_argument("--mode", choices=("lazy", "precomputed", "instanced"), default="lazy",
+                        help="lazy grows the tiling around the view, precomputed and instanced show --layers "
+                             "vertex layers as scene geometry or as instanced polygons")
+    parser.add_argument("--layers", type=int, default=6)
+    parser.add_argument("--stats", action="store_true", help="show frame timings")
+    parser.add_argument("--no-cache", action="store_true", help="do not use the on disk tiling cache")
+    parser.add_argument("--loop", choices=("asyncio", "pyglet"), default="asyncio",
+                        help="asyncio coalesces input into fixed rate simulation ticks and grows lazy tilings "
+                             "as background jobs, pyglet applies every input event directly")
+
+    args = parser.parse_args(argv)
+
+    if args.mode == "instanced" and args.model != "poincare":
+        parser.error("--mode instanced requires --model poincare")
+
+    return args
+
+
+def main(argv: typing.Optional[typing.Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+
+    from post_euclid.main import main as run
+
+    run(model_name=args.model,
+        p=args.tiling[0],
+        q=args.tiling[1],
+        mode=args.mode,
+        layers=args.layers,
+        stats=args.stats or None,
+        use_cache=not args.no_cache,
+        loop=args.loop,
+        start_time=_start_time)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""
+Application loop running a pyglet window from asyncio.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import typing
+
+import pyglet
+
+from post_euclid.hyperbolic_2d.scene import Scene
+
+_logger = logging.getLogger(__name__)
+
+
+class AsyncApp:
+    """
+    Drives a window and its scene from an asyncio event loop, in place of pyglet.app.run.
+
+    Motion input is composed by add_motion in the order it arrives and applied to the scene as one transform per
+    simulation tick, which runs at a fixed rate independent of rendering. Listeners added with
+    add_view_listener are called after every tick which moved the view.
+
+    Frames are rendered as fast as the window's vsync allows, or at render_rate without vsync. Expensive work
+    is run as named jobs (see start_job) which are cancelled when superseded, they share the thread with
+    rendering so they should await regularly, e.g. asyncio.sleep(0) between steps. Exceptions raised by jobs
+    are logged.
+    """
+
+    def __init__(self,
+                 window: pyglet.window.Window,
+                 scene: Scene,
+                 simulation_rate: float = 60.0,
+                 render_rate: float = 60.0):
+        self._window = window
+        self._scene = scene
+        self._simulation_interval = 1.0 / simulation_rate
+        self._render_interval = 1.0 / render_rate
+
+        # motion composed since the last simulation tick, None if there was none
+        self._motion = None
+
+        self._view_listeners: typing.List[typing.Callable[[], None]] = []
+        self._jobs: typing.Dict[str, asyncio.Task] = {}
+
+    def add_motion(self, dx: float = 0.0, dy: float = 0.0, angle: float = 0.0):
+        """
+        Queue a rotation followed by a translation (as Scene.rotate and Scene.translate), applied after the
+        motion queued before it at the next simulation tick.
+        """
+        tool = self._scene.model.get_transform_tool()
+
+        # translation parameters do not add up, so every motion is composed as a transform of its own
+        motion = tool.normalize(tool.gyro_mult(tool.create_translation_like(dx, dy), tool.create_rotation_like(angle)))
+
+        if self._motion is not None:
+            motion = tool.normalize(tool.gyro_mult(motion, self._motion))
+
+        self._motion = motion
+
+    def add_view_listener(self, listener: typing.Callable[[], None]):
+        self._view_listeners.append(listener)
+
+    def start_job(self, name: str, job: typing.Callable[[], typing.Awaitable[typing.Any]]) -> asyncio.Task:
+        """
+        Run job as a task, cancelling the running job of the same name.
+        """
+        self.cancel_job(name)
+
+        task = asyncio.get_running_loop().create_task(job())
+        self._jobs[name] = task
+        task.add_done_callback(lambda t: self._jobs.pop(name) if self._jobs.get(name) is t else None)
+        task.add_done_callback(lambda t: self._log_job_exception(name, t))
+
+        return task
+
+    @staticmethod
+    def _log_job_exception(name: str, task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            _logger.error("Job %s failed", name, exc_info=task.exception())
+
+    def cancel_job(self, name: str):
+        task = self._jobs.pop(name, None)
+
+        if task is not None:
+            task.cancel()
+
+    @property
+    def has_exit(self) -> bool:
+        return self._window.has_exit or pyglet.app.event_loop.has_exit
+
+    def _simulate(self):
+        if self._motion is None:
+            return
+
+        self._scene.compose(self._motion)
+        self._motion = None
+
+        for listener in self._view_listeners:
+            listener()
+
+    async def _simulation_loop(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+
+        while not self.has_exit:
+            self._simulate()
+
+            # skip ticks rather than catching up after a stall
+            next_tick = max(next_tick + self._simulation_interval, loop.time())
+            await asyncio.sleep(next_tick - loop.time())
+
+    async def _render_loop(self):
+        loop = asyncio.get_running_loop()
+        last_frame = loop.time()
+
+        while not self.has_exit:
+            now = loop.time()
+
+            # runs pyglet's own scheduled callbacks, e.g. streamed tilings
+            pyglet.clock.tick()
+            self._window.dispatch_events()
+
+            if self.has_exit:
+                break
+
+            # flip blocks until vsync if enabled
+            self._window.draw(now - last_frame)
+            last_frame = now
+
+            if self._window.vsync:
+                await asyncio.sleep(0)
+            else:
+                await asyncio.sleep(max(0.0, now + self._render_interval - loop.time()))
+
+    async def run(self):
+        """
+        Run until the window is closed or pyglet.app.exit is called.
+        """
+        simulation = asyncio.get_running_loop().create_task(self._simulation_loop())
+
+        try:
+            await self._render_loop()
+        finally:
+            simulation.cancel()
+
+            for name in list(self._jobs.keys()):
+                self.cancel_job(name)
+
+            self._window.close()
@@ -0,0 +1,231 @@
+"""
+Headless benchmarks of the geometry pipeline, nothing here touches pyglet.
+
+    python -m post_euclid.benchmark --output results.json
+    python -m post_euclid.benchmark --compare results.json
+
+Results are written as JSON so runs on different commits can be compared, --compare reports the change in
+median time per benchmark and exits non zero if any benchmark regressed by more than the threshold.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import platform
+import statistics
+import sys
+import time
+import typing
+
+import numpy
+
+from post_euclid.hyperbolic_2d.group_tiling import TriangleGroupTiling
+from post_euclid.hyperbolic_2d.hyperbolic_model_entity import HyperbolicModel
+from post_euclid.hyperbolic_2d.poincare.poincare import PoincareHyperbolicModel
+from post_euclid.hyperbolic_2d.scene import Scene
+from post_euclid.hyperbolic_2d.tiling import Tiling
+from post_euclid.hyperbolic_2d.weierstrass.weierstrass import WeierstrassHyperbolicModel
+
+
+class Benchmark:
+    """
+    A named benchmark. setup is called before every repetition and returns the callable which is timed,
+    so state built by setup (e.g. a generated scene) does not count towards the measurement.
+    """
+
+    def __init__(self, name: str, setup: typing.Callable[[], typing.Callable[[], typing.Any]]):
+        self.name = name
+        self.setup = setup
+
+    def run(self, repeat: int) -> typing.Dict[str, float]:
+        times = []
+
+        for _ in range(0, repeat):
+            fn = self.setup()
+
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+
+        return {
+            "repeat": repeat,
+            "min": min(times),
+            "median": statistics.median(times),
+            "mean": statistics.fmean(times),
+            "stdev": statistics.stdev(times) if len(times) > 1 else 0.0
+        }
+
+
+_models: typing.Dict[str, typing.Callable[[], HyperbolicModel]] = {
+    "poincare": PoincareHyperbolicModel,
+    "weierstrass": WeierstrassHyperbolicModel
+}
+
+
+def _create_tiling_scene(model: HyperbolicModel, p: int, q: int, layers: int) -> Scene:
+    scene = Scene(model)
+    Tiling(scene, p, q).generate(layers=layers)
+    return scene
+
+
+def _tiling_generate(p: int, q: int, layers: int):
+    def setup():
+        scene = Scene(PoincareHyperbolicModel())
+        return lambda: Tiling(scene, p, q).generate(layers=layers)
+
+    return setup
+
+
+def _group_enumerate(p: int, q: int, layers: int):
+    def setup():
+        tiling = TriangleGroupTiling(p, q)
+        return lambda: tiling.enumerate(layers)
+
+    return setup
+
+
+def _group_enumerate_parallel(p: int, q: int, layers: int):
+    def setup():
+        tiling = TriangleGroupTiling(p, q)
+        return lambda: tiling.enumerate_parallel(layers)
+
+    return setup
+
+
+def _transform_point_value(model_name: str, layers: int):
+    def setup():
+        scene = _create_tiling_scene(_models[model_name](), 3, 7, layers)
+        handles = range(0, scene.point_count)
+
+        def run():
+            scene.translate(0.01, 0.02)
+            scene.rotate(0.01)
+
+            for handle in handles:
+                scene.point_value(handle)
+
+        return run
+
+    return setup
+
+
+def _renderable_entities(model_name: str, layers: int):
+    def setup():
+        scene = _create_tiling_scene(_models[model_name](), 3, 7, layers)
+
+        def run():
+            scene.translate(0.01, 0.02)
+            for _ in scene.get_renderable_entities():
+                pass
+
+        return run
+
+    return setup
+
+
+def _apply_to_disk_points(model_name: str, count: int):
+    tool = _models[model_name]().get_transform_tool()
+    trsf = tool.gyro_mult(tool.create_translation_like(0.1, 0.2), tool.create_rotation_like(0.3))
+
+    r = numpy.sqrt(numpy.random.default_rng(0).uniform(0, 0.99, count))
+    theta = numpy.random.default_rng(1).uniform(0, 2 * math.pi, count)
+    points = r * numpy.exp(1j * theta)
+
+    return lambda: lambda: tool.apply_to_disk_points(trsf, points)
+
+
+def get_benchmarks() -> typing.List[Benchmark]:
+    benchmarks = []
+
+    for layers in (4, 8, 10):
+        benchmarks.append(Benchmark(f"tiling_generate[3,7,layers={layers}]", _tiling_generate(3, 7, layers)))
+
+    for layers in (3, 5):
+        benchmarks.append(Benchmark(f"tiling_generate[4,6,layers={layers}]", _tiling_generate(4, 6, layers)))
+
+    for layers in (4, 6):
+        benchmarks.append(Benchmark(f"group_enumerate[4,6,layers={layers}]", _group_enumerate(4, 6, layers)))
+
+    benchmarks.append(Benchmark("group_enumerate_parallel[4,6,layers=6]", _group_enumerate_parallel(4, 6, 6)))
+
+    for model_name in _models.keys():
+        benchmarks.append(Benchmark(f"transform_point_value[{model_name},layers=10]",
+                                    _transform_point_value(model_name, 10)))
+        benchmarks.append(Benchmark(f"renderable_entities[{model_name},layers=10]",
+                                    _renderable_entities(model_name, 10)))
+        benchmarks.append(Benchmark(f"apply_to_disk_points[{model_name},n=100000]",
+                                    _apply_to_disk_points(model_name, 100000)))
+
+    return benchmarks
+
+
+def run_benchmarks(benchmarks: typing.Iterable[Benchmark], repeat: int) -> typing.Dict[str, typing.Any]:
+    results = {}
+
+    for benchmark in benchmarks:
+        results[benchmark.name] = benchmark.run(repeat)
+        print(f"{benchmark.name:<50} median {results[benchmark.name]['median'] * 1000:10.3f} ms", file=sys.stderr)
+
+    return {
+        "meta": {
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "numpy": numpy.__version__,
+            "platform": platform.platform()
+        },
+        "results": results
+    }
+
+
+def compare(results: typing.Dict[str, typing.Any], baseline: typing.Dict[str, typing.Any], threshold: float) -> bool:
+    """
+    Print the change in median time of every benchmark present in both results.
+    :return: True if no benchmark is slower than baseline by more than the fraction threshold
+    """
+    ok = True
+
+    for name, result in results["results"].items():
+        if name not in baseline["results"]:
+            continue
+
+        ratio = result["median"] / baseline["results"][name]["median"]
+        regressed = ratio > 1 + threshold
+        ok = ok and not regressed
+
+        print(f"{name:<50} {ratio:6.2f}x{'  REGRESSED' if regressed else ''}")
+
+    return ok
+
+
+def main(argv: typing.Optional[typing.Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Headless post_euclid benchmarks")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--filter", default=None, help="only run benchmarks whose name contains this")
+    parser.add_argument("--output", default=None, help="write the results as JSON to this path")
+    parser.add_argument("--compare", default=None, help="JSON results of a previous run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed slowdown against --compare")
+    args = parser.parse_args(argv)
+
+    benchmarks = [b for b in get_benchmarks() if args.filter is None or args.filter in b.name]
+    results = run_benchmarks(benchmarks, args.repeat)
+
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    elif args.compare is None:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+        if not compare(results, baseline, args.threshold):
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
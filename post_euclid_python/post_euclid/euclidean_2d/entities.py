@@ -7,10 +7,10 @@ import numpy
 
 
 class Euclidean2D:
-    pass
+    __slots__ = ()
 
 
-@dataclass
+@dataclass(slots=True)
 class Point(Euclidean2D):
     x: float
     y: float
@@ -60,13 +60,13 @@ class Point(Euclidean2D):
         return hash((self.x, self.y))
 
 
-@dataclass
+@dataclass(slots=True)
 class LineSegment(Euclidean2D):
     p0: Point
     p1: Point
 
 
-@dataclass
+@dataclass(slots=True)
 class Circle(Euclidean2D):
     center: Point
     radius: float
@@ -80,13 +80,83 @@ class Circle(Euclidean2D):
         return Circle(Point(0, 0), 1)
 
 
-@dataclass
+@dataclass(slots=True)
 class CircleArc(Euclidean2D):
     circle: Circle
     angle_0: float
     angle_1: float
 
 
+@dataclass(slots=True)
+class PointArray(Euclidean2D):
+    """
+    Struct-of-arrays container of points, stored as an (N,) complex array of x + iy.
+    """
+    points: numpy.ndarray
+
+    @property
+    def x(self) -> numpy.ndarray:
+        return self.points.real
+
+    @property
+    def y(self) -> numpy.ndarray:
+        return self.points.imag
+
+    def __len__(self):
+        return len(self.points)
+
+    def __iter__(self) -> typing.Iterator[Point]:
+        for p in self.points.tolist():
+            yield Point(p.real, p.imag)
+
+
+@dataclass(slots=True)
+class ArcArray(Euclidean2D):
+    """
+    Struct-of-arrays container of circle arcs, points are stored as complex x + iy.
+    Where straight is set the arc is degenerate: it represents the line segment p0 -> p1 and its circle values
+    are zero. Otherwise p0, p1 are the arc end points, in no particular order.
+    """
+    p0: numpy.ndarray
+    p1: numpy.ndarray
+    centers: numpy.ndarray
+    radii: numpy.ndarray
+    angle_0: numpy.ndarray
+    angle_1: numpy.ndarray
+    straight: numpy.ndarray
+
+    def __len__(self):
+        return len(self.straight)
+
+    def __iter__(self) -> typing.Iterator[typing.Union[LineSegment, CircleArc]]:
+        for p0, p1, center, radius, angle_0, angle_1, straight in zip(
+                self.p0.tolist(), self.p1.tolist(), self.centers.tolist(), self.radii.tolist(),
+                self.angle_0.tolist(), self.angle_1.tolist(), self.straight.tolist()):
+            if straight:
+                yield LineSegment(Point(p0.real, p0.imag), Point(p1.real, p1.imag))
+            else:
+                yield CircleArc(Circle(Point(center.real, center.imag), radius), angle_0, angle_1)
+
+    def tessellate(self, segments: int, counts: typing.Optional[numpy.ndarray] = None) -> numpy.ndarray:
+        """
+        :param counts: (N,) number of segments to use for each arc, at most segments. The remaining points of
+        an arc repeat its end point, so their segments are degenerate
+        :return: (N, segments + 1) complex array of points along each arc, from angle_0 to angle_1,
+        or from p0 to p1 where the arc is straight.
+        """
+        t = numpy.linspace(0.0, 1.0, segments + 1)
+
+        if counts is not None:
+            t = numpy.minimum(numpy.arange(segments + 1) / numpy.maximum(counts, 1)[:, None], 1.0)
+
+        angles = self.angle_0[:, None] + (self.angle_1 - self.angle_0)[:, None] * t
+        # angles are measured in render space, where both axes are flipped (see Canvas._to_render_coords)
+        curved = self.centers[:, None] - self.radii[:, None] * numpy.exp(1j * angles)
+        straight = self.p0[:, None] + (self.p1 - self.p0)[:, None] * t
+
+        return numpy.where(self.straight[:, None], straight, curved)
+
+
 def midpoint(p0: Point, p1: Point) -> Point:
     dx = p1.x - p0.x
     dy = p1.y - p0.y
@@ -126,6 +196,8 @@ def normalize_angle(angle: float) -> float:
 
 class Line(Euclidean2D):
 
+    __slots__ = ("origin", "delta")
+
     def __init__(self, origin: Point, delta: Point):
         delta_mag = numpy.hypot(*delta)
 
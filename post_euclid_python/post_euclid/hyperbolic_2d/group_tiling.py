@@ -0,0 +1,347 @@
+"""
+{p, q} tilings generated from the rotation subgroup of the (2, p, q) triangle group.
+"""
+from __future__ import annotations
+
+import cmath
+import itertools
+import math
+import os
+import typing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy
+
+from post_euclid.hyperbolic_2d.scene import Scene
+from post_euclid.hyperbolic_2d.tiling import fundamental_polygon, check_hyperbolic
+from post_euclid.hyperbolic_2d.vertex_index import merge_points
+
+
+def _rotation(angle: float) -> numpy.ndarray:
+    return numpy.array([
+        [cmath.exp(0.5j * angle), 0],
+        [0, cmath.exp(-0.5j * angle)]
+    ])
+
+
+def _translation(a: complex) -> numpy.ndarray:
+    # moves the origin onto a, normalized to unit determinant
+    return numpy.array([
+        [1, a],
+        [a.conjugate(), 1]
+    ]) / math.sqrt(1 - abs(a) ** 2)
+
+
+def apply_mobius(transforms: numpy.ndarray, points: numpy.ndarray) -> numpy.ndarray:
+    """
+    Apply a stack of mobius transforms to the same points.
+    :param transforms: (N, 2, 2) complex array
+    :param points: (P,) complex array of disk coordinates
+    :return: (N, P) complex array, row i holds the points under transform i
+    """
+    a = transforms[:, 0, 0, None]
+    b = transforms[:, 0, 1, None]
+    c = transforms[:, 1, 0, None]
+    d = transforms[:, 1, 1, None]
+
+    return (a * points + b) / (c * points + d)
+
+
+def polygon_edges(polygons: numpy.ndarray) -> numpy.ndarray:
+    """
+    :param polygons: (N, p) vertex indices of each polygon
+    :return: (E, 2) int32 array, every edge of the polygons once
+    """
+    edges = numpy.stack((polygons, numpy.roll(polygons, -1, axis=1)), axis=2).reshape(-1, 2)
+    return numpy.unique(numpy.sort(edges, axis=1), axis=0).astype(numpy.int32)
+
+
+def polygon_adjacency(polygons: numpy.ndarray) -> numpy.ndarray:
+    """
+    :param polygons: (N, p) vertex indices of each polygon
+    :return: (N, p) int32 array, the polygon across the edge from vertex i to vertex i + 1 of each polygon,
+    -1 where the edge is on the boundary of the polygons
+    """
+    count, p = polygons.shape
+    a = polygons.astype(numpy.int64)
+    b = numpy.roll(a, -1, axis=1)
+
+    # an interior edge appears once in each of the two polygons sharing it, sorting brings those together
+    keys = (numpy.minimum(a, b) * (a.max(initial=0) + 1) + numpy.maximum(a, b)).reshape(-1)
+    order = numpy.argsort(keys, kind="stable")
+    shared = keys[order[1:]] == keys[order[:-1]]
+
+    first = order[:-1][shared]
+    second = order[1:][shared]
+
+    adjacency = numpy.full(count * p, -1, dtype=numpy.int32)
+    adjacency[first] = second // p
+    adjacency[second] = first // p
+
+    return adjacency.reshape(count, p)
+
+
+@dataclass(slots=True)
+class TileLayer:
+    """
+    Tiles of one vertex layer, see TriangleGroupTiling.
+
+    transforms: (N, 2, 2) mobius matrices mapping the fundamental polygon onto each tile
+    contact: (N,) number of vertices each tile shares with the previous layers
+    shared: (N,) number of tiles of the layer so far meeting at the first outer vertex of each tile
+    """
+    transforms: numpy.ndarray
+    contact: numpy.ndarray
+    shared: numpy.ndarray
+
+    def __len__(self):
+        return len(self.transforms)
+
+    @staticmethod
+    def concatenate(layers: typing.Sequence[TileLayer]) -> TileLayer:
+        if len(layers) == 0:
+            return TileLayer(numpy.zeros((0, 2, 2), dtype=numpy.complex128),
+                             numpy.zeros(0, dtype=numpy.int8),
+                             numpy.zeros(0, dtype=numpy.int8))
+
+        return TileLayer(numpy.concatenate([layer.transforms for layer in layers]),
+                         numpy.concatenate([layer.contact for layer in layers]),
+                         numpy.concatenate([layer.shared for layer in layers]))
+
+
+def _enumerate_branches(p: int, q: int, layers: int, branches: typing.Sequence[int]) -> typing.List[TileLayer]:
+    # runs in a worker process, see TriangleGroupTiling.enumerate_parallel
+    return TriangleGroupTiling(p, q).enumerate(layers, branches)
+
+
+class TriangleGroupTiling:
+    """
+    Generates the tiles of a {p, q} tiling as words over two rotations: R by 2 pi / p about the center of the
+    fundamental polygon, and A by 2 pi / q about its first vertex. Each tile is a single 2x2 mobius matrix
+    applied to the fundamental polygon.
+
+    Tiles are enumerated by vertex layer, layer n + 1 holding every tile which shares a vertex with layer n
+    and is not in an earlier layer. The vertices on the outside of layer n each get a fan of new tiles, and
+    each of those vertices is owned by exactly one tile of layer n. A tile's type (its contact with the
+    previous layers and the number of tiles sharing its first outer vertex) then fixes which words extend it.
+    So no tile is produced twice, without comparing any coordinates. The extension words are a finite set of
+    matrices, so a whole layer is generated as a few batched matrix products.
+
+    Tile labels are chosen such that local vertex 0 is the first outer vertex of the tile, going around the
+    tile in the direction of increasing vertex index.
+    """
+
+    def __init__(self, p: int, q: int):
+        check_hyperbolic(p, q)
+
+        self._p = p
+        self._q = q
+
+        self._vertices = numpy.array(fundamental_polygon(p, q))
+
+        # vertices are in clockwise order, so R maps vertex i onto vertex i + 1
+        self._r = _rotation(-2 * math.pi / p)
+
+        # A maps vertex 1 onto vertex p - 1, i.e. the fundamental polygon onto its neighbour across that edge
+        v0 = complex(self._vertices[0])
+        to_v0 = _translation(v0)
+        from_v0 = _translation(-v0)
+
+        candidates = [to_v0 @ _rotation(sign * 2 * math.pi / q) @ from_v0 for sign in (1, -1)]
+        self._a = min(candidates, key=lambda m: abs(apply_mobius(m[None], self._vertices[1:2])[0, 0] -
+                                                   self._vertices[-1]))
+
+        self._root_words = self._create_root_words()
+        self._words: typing.Dict[typing.Tuple[int, int], typing.List[typing.Tuple[numpy.ndarray, int, int]]] = {}
+
+    @property
+    def p(self) -> int:
+        return self._p
+
+    @property
+    def q(self) -> int:
+        return self._q
+
+    @property
+    def fundamental_polygon(self) -> numpy.ndarray:
+        return self._vertices
+
+    @property
+    def branch_count(self) -> int:
+        """
+        :return: the number of tiles in the second layer, each of which roots a disjoint subtree of the tiling
+        """
+        return len(self._root_words)
+
+    def _word(self, vertex: int, turns: int) -> numpy.ndarray:
+        # R^vertex A^turns R: the tile turns steps around the given vertex, relabelled to start one vertex on
+        return (numpy.linalg.matrix_power(self._r, vertex) @
+                numpy.linalg.matrix_power(self._a, turns) @
+                self._r)
+
+    def _fan(self, vertex: int, shared: int, last_owned: bool) -> typing.List[typing.Tuple[numpy.ndarray, int, int]]:
+        """
+        Words for the new tiles around an owned vertex, skipping the first new tile which belongs to the fan of
+        the previous vertex.
+        :param shared: number of existing tiles meeting at the vertex
+        :param last_owned: whether the next vertex is shared with, and owned by, the next tile of the layer
+        :return: word, contact and shared count of each new tile
+        """
+        words = []
+        first = shared + 1
+
+        for turns in range(first, self._q):
+            if turns < self._q - 1:
+                contact = 1
+            elif self._q == 3 and last_owned:
+                # the next vertex has no other new tiles, so this one wraps around it onto the next tile
+                contact = 3
+            else:
+                contact = 2
+
+            # a previous tile with a single outer vertex (triangles sharing an edge) also meets at our first
+            shared_next = 3 if self._p == 3 and turns == first else 2
+
+            words.append((self._word(vertex, turns), contact, shared_next))
+
+        return words
+
+    def _create_root_words(self) -> typing.List[typing.Tuple[numpy.ndarray, int, int]]:
+        words = []
+        for vertex in range(0, self._p):
+            words.extend(self._fan(vertex, 1, False))
+
+        return words
+
+    def _get_words(self, contact: int, shared: int) -> typing.List[typing.Tuple[numpy.ndarray, int, int]]:
+        key = (contact, shared)
+
+        if key not in self._words:
+            words = []
+
+            # the tile owns its outer vertices except the last, the first meets shared tiles and the others one
+            owned = self._p - contact - 1
+            for vertex in range(0, owned):
+                words.extend(self._fan(vertex, shared if vertex == 0 else 1, vertex == owned - 1))
+
+            self._words[key] = words
+
+        return self._words[key]
+
+    def root_layer(self) -> TileLayer:
+        return TileLayer(numpy.eye(2, dtype=numpy.complex128)[None],
+                         numpy.zeros(1, dtype=numpy.int8),
+                         numpy.zeros(1, dtype=numpy.int8))
+
+    def branch_layer(self, branches: typing.Sequence[int]) -> TileLayer:
+        """
+        :return: the given tiles of the second layer, see branch_count
+        """
+        words = [self._root_words[i] for i in branches]
+
+        return TileLayer(numpy.array([w for w, _, _ in words], dtype=numpy.complex128).reshape(-1, 2, 2),
+                         numpy.array([c for _, c, _ in words], dtype=numpy.int8),
+                         numpy.array([s for _, _, s in words], dtype=numpy.int8))
+
+    def next_layer(self, layer: TileLayer) -> TileLayer:
+        """
+        :return: the tiles of the next vertex layer grown from the given layer
+        """
+        if len(layer) == 1 and layer.contact[0] == 0:
+            return self.branch_layer(range(0, self.branch_count))
+
+        result = []
+
+        # tiles of the same type extend by the same words, one batched product per type and word
+        for key in set(zip(layer.contact.tolist(), layer.shared.tolist())):
+            parents = layer.transforms[(layer.contact == key[0]) & (layer.shared == key[1])]
+
+            for word, word_contact, word_shared in self._get_words(*key):
+                result.append(TileLayer(parents @ word,
+                                        numpy.full(len(parents), word_contact, dtype=numpy.int8),
+                                        numpy.full(len(parents), word_shared, dtype=numpy.int8)))
+
+        return TileLayer.concatenate(result)
+
+    def enumerate(self, layers: int, branches: typing.Optional[typing.Sequence[int]] = None) -> typing.List[TileLayer]:
+        """
+        :param layers: number of vertex layers, the first being the fundamental polygon alone
+        :param branches: only enumerate the subtrees of these tiles of the second layer. Different branches
+        hold disjoint sets of tiles, so they can be enumerated independently, the fundamental polygon is omitted.
+        :return: the tiles of each layer
+        """
+        return list(self.iterate(layers, branches))
+
+    def iterate(self, layers: int, branches: typing.Optional[typing.Sequence[int]] = None) -> typing.Iterator[TileLayer]:
+        """
+        As enumerate, yielding each layer as soon as it is generated.
+        """
+        if layers <= 0:
+            return
+
+        if branches is None:
+            layer = self.root_layer()
+        else:
+            layer = self.branch_layer(branches)
+            layers -= 1
+
+        yield layer
+
+        for _ in range(1, layers):
+            layer = self.next_layer(layer)
+            yield layer
+
+    def enumerate_parallel(self, layers: int, workers: typing.Optional[int] = None) -> typing.List[TileLayer]:
+        """
+        As enumerate, with the subtrees of the second layer tiles spread over a pool of worker processes.
+        :param workers: number of processes, defaults to the number of cores
+        """
+        if layers <= 2:
+            return self.enumerate(layers)
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+
+        # interleave the branches, neighbouring branches tend to have subtrees of similar size
+        chunks = [list(range(i, self.branch_count, workers)) for i in range(0, min(workers, self.branch_count))]
+
+        with ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+            results = list(executor.map(_enumerate_branches,
+                                        itertools.repeat(self._p),
+                                        itertools.repeat(self._q),
+                                        itertools.repeat(layers),
+                                        chunks))
+
+        return [self.root_layer()] + [TileLayer.concatenate([result[i] for result in results])
+                                      for i in range(0, layers - 1)]
+
+    def tile_vertices(self, transforms: numpy.ndarray) -> numpy.ndarray:
+        """
+        :return: (N, p) complex array, the vertices of each tile
+        """
+        return apply_mobius(transforms, self._vertices)
+
+    def tile_centers(self, transforms: numpy.ndarray) -> numpy.ndarray:
+        return transforms[:, 0, 1] / transforms[:, 1, 1]
+
+    def tile_mesh(self, layers: typing.Iterable[TileLayer],
+                  vertex_tolerance: float = 1e-6) -> typing.Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Vertices of the tiles with those shared between tiles merged, as in Tiling.
+        :return: complex array of the distinct vertices, and (N, p) int32 array of the vertex indices of each tile
+        """
+        transforms = TileLayer.concatenate(list(layers)).transforms
+        vertices, indices = merge_points(self.tile_vertices(transforms), vertex_tolerance)
+
+        return vertices, indices.reshape(-1, self._p)
+
+    def add_to_scene(self, scene: Scene, layers: typing.Iterable[TileLayer], vertex_tolerance: float = 1e-6):
+        """
+        Add the vertices and edges of the tiles to the scene, as underlying points.
+        """
+        vertices, polygons = self.tile_mesh(layers, vertex_tolerance)
+        handles = scene.create_underlying_point_references(vertices)
+        edges = polygon_edges(polygons)
+
+        scene.add_line_segments(handles[edges[:, 0]], handles[edges[:, 1]])
@@ -3,6 +3,8 @@ from __future__ import annotations
 import typing
 from typing import TypeVar, Generic
 
+import numpy
+
 from post_euclid.euclidean_2d.entities import Euclidean2D
 
 
@@ -40,6 +42,42 @@ class HyperbolicModelTransformTool(Generic[T]):
         """
         raise NotImplementedError()
 
+    def normalize(self, trsf: T) -> T:
+        """
+        :return: the canonical form of a transform which has drifted through repeated composition, i.e. the
+        nearest exact isometry of the plane equivalent to trsf.
+        """
+        raise NotImplementedError()
+
+    def from_disk_points(self, points: numpy.ndarray) -> numpy.ndarray:
+        """
+        :param points: (N,) complex array of poincare disk coordinates
+        :return: the points in the model's native coordinate array layout, see apply_to_array
+        """
+        raise NotImplementedError()
+
+    def to_disk_points(self, coords: numpy.ndarray) -> numpy.ndarray:
+        """
+        Inverse of from_disk_points.
+        :return: (N,) complex array of poincare disk coordinates
+        """
+        raise NotImplementedError()
+
+    def apply_to_array(self, trsf: T, coords: numpy.ndarray) -> numpy.ndarray:
+        """
+        Apply the transform to many points in native coordinates in a single vectorized pass, the batch
+        equivalent of HyperbolicModelEntity.apply_transform on points.
+        :return: a new array holding the transformed coordinates
+        """
+        raise NotImplementedError()
+
+    def apply_to_disk_points(self, trsf: T, points: numpy.ndarray) -> numpy.ndarray:
+        """
+        Apply the transform to an (N,) complex array of poincare disk coordinates in a single vectorized pass.
+        :return: a new array holding the transformed disk coordinates
+        """
+        return self.to_disk_points(self.apply_to_array(trsf, self.from_disk_points(points)))
+
 
 T_Point = TypeVar("T_Point")
 T_Line = TypeVar("T_Line")
@@ -67,6 +105,12 @@ class HyperbolicModelEntityFactory(Generic[T, T_Point, T_Line]):
     def create_point(self) -> T_Point:
         raise NotImplementedError()
 
+    def create_point_at(self, x: float, y: float) -> T_Point:
+        """
+        Create a point whose euclidean (poincare disk) representation is x, y.
+        """
+        raise NotImplementedError()
+
     def create_line_segment(self, p0: T_Point, p1: T_Point) -> T_Line:
         raise NotImplementedError()
 
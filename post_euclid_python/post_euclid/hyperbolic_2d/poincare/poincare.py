@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import cmath
 import math
 import typing
 from dataclasses import dataclass
@@ -15,6 +16,9 @@ from post_euclid.hyperbolic_2d.hyperbolic_model_entity import HyperbolicModelEnt
 
 T_Transform = typing.Tuple[complex, complex, complex, complex]
 
+# smallest 1 - |b / a|^2 from which normalize derives the scale of a transform
+_RATIO_RESOLUTION = 1e-8
+
 
 class PoincareModelTransformTool(HyperbolicModelTransformTool[T_Transform]):
 
@@ -68,10 +72,87 @@ class PoincareModelTransformTool(HyperbolicModelTransformTool[T_Transform]):
             -c * det_inv,   a * det_inv
         )
 
+    def normalize(self, trsf: T_Transform) -> T_Transform:
+        """
+        Rescale to the SU(1,1) structure (a, b, conj(b), conj(a)) shared by all isometries of the disk, with
+        |a|^2 - |b|^2 == 1. Far from the identity the scale can not be recovered from the entries, there trsf has
+        to be a product of normalized transforms.
+        """
+        a, b, c, d = (complex(v) for v in trsf)
+
+        if a == 0 or d == 0:
+            raise ValueError("Transform does not preserve the disk")
+
+        # the mobius transform is fixed by the ratios b / a and a / d, unlike the determinant these do not cancel
+        # for large translations
+        r = (b / a + (c / d).conjugate()) / 2
+        rr = abs(r) ** 2
+
+        rotation = cmath.sqrt(a / d)
+        rotation /= abs(rotation)
+
+        # of the two roots take the one with the phase of a
+        if (rotation * a.conjugate()).real < 0:
+            rotation = -rotation
+
+        if rr < 1 - _RATIO_RESOLUTION:
+            a = rotation / math.sqrt(1 - rr)
+            b = a * r
+        elif rr < 1 or abs(a) >= 1 / math.sqrt(_RATIO_RESOLUTION):
+            # 1 - |b / a|^2 is not resolved this far out, keep the magnitude of b instead, which is exact for
+            # products of normalized transforms
+            b = abs(b) * r / abs(r)
+            a = rotation * math.sqrt(1 + abs(b) ** 2)
+        else:
+            raise ValueError("Transform does not preserve the disk")
+
+        return (a,              b,
+                b.conjugate(),  a.conjugate())
+
+    def from_disk_points(self, points: numpy.ndarray) -> numpy.ndarray:
+        # native coordinates are the disk coordinates
+        return numpy.asarray(points, dtype=numpy.complex128)
+
+    def to_disk_points(self, coords: numpy.ndarray) -> numpy.ndarray:
+        return numpy.asarray(coords, dtype=numpy.complex128)
+
+    def apply_to_array(self, trsf: T_Transform, coords: numpy.ndarray) -> numpy.ndarray:
+        """
+        :param coords: (N,) complex array of disk coordinates
+        """
+        return (trsf[0] * coords + trsf[1]) / (trsf[2] * coords + trsf[3])
+
+    def apply_to_disk_points(self, trsf: T_Transform, points: numpy.ndarray) -> numpy.ndarray:
+        return self.apply_to_array(trsf, points)
 
 
 _TRANSFORM_TOOL = PoincareModelTransformTool()
 
+
+class PoincareModelReflection:
+    """
+    Reflection across the geodesic through two points, operating directly on disk coordinates.
+    Reflections reverse orientation, so they are not representable as a T_Transform.
+    """
+
+    @staticmethod
+    def reflect(points, p0, p1):
+        """
+        Mirror points (complex or complex array) across the geodesic through p0 and p1.
+        p0 and p1 may also be arrays, broadcast against points.
+        """
+        # move p0 to the origin, where the geodesic becomes a line through the origin
+        p0_conj = p0.conjugate()
+        q1 = (p1 - p0) / (1 - p0_conj * p1)
+        z = (points - p0) / (1 - p0_conj * points)
+
+        # reflect across the line, z -> u^2 * conj(z) with u the unit direction of the line
+        z = (q1 / q1.conjugate()) * z.conjugate()
+
+        # and move the origin back onto p0
+        return (z + p0) / (1 + p0_conj * z)
+
+
 class PoincareModelEntity(HyperbolicModelEntity[T_Transform]):
 
     def get_transform_tool(self) -> HyperbolicModelTransformTool[T]:
@@ -185,12 +266,76 @@ class PoincareModelLineSegment(PoincareModelEntity):
                 angle_max
             )
 
+    @staticmethod
+    def get_euclidean_representation_batch(points: numpy.ndarray,
+                                           p0_indices: numpy.ndarray,
+                                           p1_indices: numpy.ndarray) -> euclidean_2d.entities.ArcArray:
+        """
+        Vectorized equivalent of get_euclidean_representation for the segments (points[p0_indices[i]],
+        points[p1_indices[i]]), where points is an (N,) complex array of disk coordinates.
+        """
+        p0 = points[p0_indices]
+        p1 = points[p1_indices]
+
+        px = p0.real
+        py = p0.imag
+
+        qx = p1.real
+        qy = p1.imag
+
+        u = (px * px + py * py + 1)
+        v = (qx * qx + qy * qy + 1)
+
+        denom = 2 * (px * qy - py * qx)
+
+        # segments touching the origin, or collinear with it, have no finite circle
+        straight = (p0 == 0) | (p1 == 0) | (numpy.abs(denom) < 10e-15)
+        denom = numpy.where(straight, 1.0, denom)
+
+        ox = (qy * u - py * v) / denom
+        oy = (-qx * u + px * v) / denom
+
+        # for tiny segments near the boundary rounding can put the circle center inside the disk, such segments
+        # are drawn straight rather than given a NaN radius
+        rr = ox * ox + oy * oy - 1
+        straight |= ~(rr > 0)
+
+        ox = numpy.where(straight, 0.0, ox)
+        oy = numpy.where(straight, 0.0, oy)
+
+        radii = numpy.sqrt(numpy.where(straight, 0.0, rr))
+
+        # same normalization as normalize_angle, -pi -> pi onto 0 -> 2pi
+        angle_0 = numpy.arctan2(oy - py, ox - px)
+        angle_1 = numpy.arctan2(oy - qy, ox - qx)
+        angle_0 = numpy.fmod(numpy.where(angle_0 >= 0, angle_0, 2 * numpy.pi + angle_0) + 2 * numpy.pi, 2 * numpy.pi)
+        angle_1 = numpy.fmod(numpy.where(angle_1 >= 0, angle_1, 2 * numpy.pi + angle_1) + 2 * numpy.pi, 2 * numpy.pi)
+
+        angle_min = numpy.minimum(angle_0, angle_1)
+        angle_max = numpy.maximum(angle_0, angle_1)
+
+        delta_angle = angle_max - angle_min
+        angle_max = numpy.where(delta_angle > numpy.pi, angle_min - (2 * numpy.pi - delta_angle), angle_max)
+
+        return euclidean_2d.entities.ArcArray(
+            p0=p0,
+            p1=p1,
+            centers=ox + 1j * oy,
+            radii=radii,
+            angle_0=numpy.where(straight, 0.0, angle_min),
+            angle_1=numpy.where(straight, 0.0, angle_max),
+            straight=straight
+        )
+
 
 class PoincareModelEntityFactory(HyperbolicModelEntityFactory[T_Transform, PoincareModelPoint, PoincareModelLineSegment]):
 
     def create_point(self) -> PoincareModelPoint:
         return PoincareModelPoint(0, 0)
 
+    def create_point_at(self, x: float, y: float) -> PoincareModelPoint:
+        return PoincareModelPoint(x, y)
+
     def create_line_segment(self, p0: PoincareModelPoint, p1: PoincareModelPoint) -> PoincareModelLineSegment:
         return PoincareModelLineSegment(p0, p1)
 
@@ -3,9 +3,12 @@ Represents a scene of entities placed on the poincare disk
 """
 from __future__ import annotations
 
+import functools
+import math
+import threading
 import typing
 import uuid
-from copy import copy
+import weakref
 from dataclasses import dataclass
 
 import numpy
@@ -16,17 +19,33 @@ from post_euclid.hyperbolic_2d.hyperbolic_model_entity import HyperbolicModelEnt
     HyperbolicModel
 from post_euclid.hyperbolic_2d.poincare.poincare import PoincareModelEntity, PoincareModelPoint, \
     PoincareModelLineSegment, PoincareModelTransformTool
+from post_euclid.profiling import NULL_STATS
+
+
+PointHandle = int
+"""
+Points are referred to by integer handles, which are also their index into the scene's point arrays.
+"""
+
+PointKey = typing.Union[PointHandle, str]
+
+
+def _synchronized(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+
+    return wrapper
 
 
 class SceneItem:
 
-    def __init__(self, keys: typing.Set[str]):
-        self._keys = keys
+    __slots__ = ()
 
     @property
-    def keys(self):
-        for k in self._keys:
-            yield k
+    def keys(self) -> typing.Iterator[PointHandle]:
+        raise NotImplementedError()
 
     def get_concrete_geometry(self, scene: Scene) -> HyperbolicModelEntity:
         raise NotImplementedError()
@@ -34,92 +53,526 @@ class SceneItem:
 
 class ScenePoint(SceneItem):
 
-    def __init__(self, p: str):
-        super().__init__({p})
+    __slots__ = ("p",)
+
+    def __init__(self, p: PointHandle):
         self.p = p
 
+    @property
+    def keys(self) -> typing.Iterator[PointHandle]:
+        yield self.p
+
     def get_concrete_poincare_geometry(self, scene: Scene) -> HyperbolicModelEntity:
         return scene.point_value(self.p)
 
 
 class SceneLineSegment(SceneItem):
 
-    def __init__(self, p0: str, p1: str):
-        super().__init__({p0, p1})
-        self._p0 = p0
-        self._p1 = p1
+    __slots__ = ("p0", "p1")
+
+    def __init__(self, p0: PointHandle, p1: PointHandle):
+        self.p0 = p0
+        self.p1 = p1
+
+    @property
+    def keys(self) -> typing.Iterator[PointHandle]:
+        yield self.p0
+        yield self.p1
 
     def get_concrete_geometry(self, scene: Scene) -> PoincareModelLineSegment:
         return scene.model.get_factory().create_line_segment(
-            scene.point_value(self._p0),
-            scene.point_value(self._p1)
+            scene.point_value(self.p0),
+            scene.point_value(self.p1)
         )
 
 
 class Scene:
 
+    _INITIAL_CAPACITY = 64
+
     def __init__(self, model: HyperbolicModel):
-        self._points: typing.Dict[str, HyperbolicModelEntity] = {}
-        self._scene_items: typing.List[SceneItem] = []
+        # held by every method reading or modifying the points, items or transform, see lock
+        self._lock = threading.RLock()
+
+        # untransformed points are stored column-wise as poincare disk coordinates, indexed by point handle
+        self._points = numpy.zeros(Scene._INITIAL_CAPACITY, dtype=numpy.complex128)
+        self._point_count = 0
+
+        # handles of removed points, reused before the point array is extended
+        self._free_handles: typing.Set[PointHandle] = set()
+
+        # string keys for the compatibility layer, see create_named_point_reference
+        self._point_names: typing.Dict[str, PointHandle] = {}
+
+        # transformed copy of the points, valid until the scene transform or the point set changes
+        self._transformed_points: typing.Optional[numpy.ndarray] = None
+
+        # insertion ordered, used as a set to allow removal
+        self._scene_items: typing.Dict[SceneItem, None] = {}
+
+        # line segments are evaluated as a batch, so their point handles are kept alongside the items.
+        # _segment_positions maps each segment to its position in both lists
+        self._segment_indices: typing.List[typing.Tuple[PointHandle, PointHandle]] = []
+        self._segment_items: typing.List[SceneLineSegment] = []
+        self._segment_positions: typing.Dict[SceneLineSegment, int] = {}
+        self._segment_index_array: typing.Optional[numpy.ndarray] = None
+
+        # incremented whenever points or items are added, removed or modified
+        self._revision = 0
+
+        # incremented whenever the transform changes, together with the revision this keys the caches below
+        self._transform_generation = 0
+
+        # (key, value) of the last get_renderable_arcs / non segment get_renderable_entities evaluation
+        self._arcs_cache: typing.Optional[typing.Tuple[typing.Tuple[int, int, float],
+                                                       euclidean_2d.entities.ArcArray]] = None
+        self._entities_cache: typing.Optional[typing.Tuple[typing.Tuple[int, int],
+                                                           typing.List[euclidean_2d.entities.Euclidean2D]]] = None
+
         self._model = model
-        self._transform_old = None
+        # transforms saved by push_transform per thread, innermost last, see _get_transform_stack
+        self._transform_stacks: weakref.WeakKeyDictionary[threading.Thread, typing.List[typing.Any]] = \
+            weakref.WeakKeyDictionary()
         self._transform = self._model.get_transform_tool().create_identity()
 
+        # see post_euclid.profiling
+        self.stats = NULL_STATS
+
+        # rebase once the transform moves the origin further than this (hyperbolic distance), None to disable
+        self.rebase_distance: typing.Optional[float] = None
+        self._rebase_listeners: typing.List[typing.Callable[[typing.Any], None]] = []
+
     def __enter__(self):
-        self._transform_old = copy(self._transform)
+        self.push_transform()
+        return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self._transform = self._transform_old
+        self.pop_transform()
+
+    def _get_transform_stack(self) -> typing.List[typing.Any]:
+        # each thread has its own stack, so pushes and pops of different threads do not interleave
+        return self._transform_stacks.setdefault(threading.current_thread(), [])
+
+    @_synchronized
+    def push_transform(self):
+        """
+        Save the scene transform, to be restored by the matching pop_transform. Saves nest, `with scene:` pushes
+        on entry and pops on exit. Each thread saves to its own stack.
+        """
+        # transforms are never modified in place, so saving one needs no copy
+        self._get_transform_stack().append(self._transform)
+
+    @_synchronized
+    def pop_transform(self):
+        """
+        Restore the transform saved by the innermost push_transform of the calling thread.
+        """
+        stack = self._get_transform_stack()
+
+        if len(stack) == 0:
+            raise RuntimeError("pop_transform without a matching push_transform")
+
+        transform = stack.pop()
+
+        # leave the caches valid if the transform was not changed in between
+        if transform is not self._transform:
+            self._set_transform(transform)
+
+    @property
+    def lock(self) -> threading.RLock:
+        """
+        Reentrant lock guarding the scene. Individual methods are atomic, hold the lock to read or modify
+        several things consistently, e.g. a renderer reading the segment count and the geometry of a scene
+        which a background thread is adding to.
+        """
+        return self._lock
 
     @property
     def model(self) -> HyperbolicModel:
         return self._model
 
+    @property
+    def transform(self):
+        return self._transform
+
+    @property
+    def point_count(self) -> int:
+        """
+        :return: the number of point slots, all handles are below this. Slots of removed points are included
+        """
+        return self._point_count
+
+    @property
+    def revision(self) -> int:
+        """
+        :return: a counter which changes whenever the points or items of the scene change (but not the transform)
+        """
+        return self._revision
+
+    @property
+    def transform_generation(self) -> int:
+        """
+        :return: a counter which changes whenever the scene transform changes
+        """
+        return self._transform_generation
+
+    @property
+    def segment_count(self) -> int:
+        return len(self._segment_indices)
+
+    def _set_transform(self, transform):
+        self._transform = transform
+        self._transform_generation += 1
+        self._transformed_points = None
+
+    @_synchronized
+    def _compose(self, transform):
+        tool = self._model.get_transform_tool()
+
+        # renormalize on every composition, rounding errors would otherwise accumulate in the scene transform
+        # until it no longer maps the disk onto itself. transform is normalized first as far from the origin
+        # only products of normalized transforms can be renormalized exactly
+        self._set_transform(tool.normalize(tool.gyro_mult(tool.normalize(transform), self._transform)))
+
+        if self.rebase_distance is not None and self.transform_distance() > self.rebase_distance:
+            self.rebase()
+
+    def transform_distance(self) -> float:
+        """
+        :return: hyperbolic distance the scene transform moves the origin by
+        """
+        origin = self._model.get_transform_tool().apply_to_disk_points(
+            self._transform, numpy.zeros(1, dtype=numpy.complex128))
+
+        return 2 * math.atanh(min(abs(origin[0]), 1 - 1e-16))
+
+    def add_rebase_listener(self, listener: typing.Callable[[typing.Any], None]):
+        """
+        :param listener: called after every rebase with the transform which was applied to the underlying points
+        """
+        self._rebase_listeners.append(listener)
+
+    @_synchronized
+    def rebase(self):
+        """
+        Apply the scene transform to the underlying points and reset it to the identity.
+
+        Points around the current view are moved back near the origin of the underlying coordinates. Points
+        pressed against the boundary lose precision, so rebasing keeps it where it is needed as the view
+        moves away from the origin. Point handles remain valid, their underlying values change.
+        """
+        tool = self._model.get_transform_tool()
+        transform = self._transform
+
+        self._points[:self._point_count] = self.get_transformed_points()
+
+        # keep the saved transforms of every thread relative to the new underlying points
+        inverse = tool.get_inverse(transform)
+        for stack in self._transform_stacks.values():
+            stack[:] = [tool.normalize(tool.gyro_mult(saved, inverse)) for saved in stack]
+
+        self._set_transform(tool.create_identity())
+
+        for listener in self._rebase_listeners:
+            listener(transform)
+
+    def compose(self, transform):
+        """
+        Apply transform on top of the scene transform, e.g. several motions combined into one transform.
+        """
+        with self.stats.timer("compose"):
+            self._compose(transform)
+
     def translate(self, dx: float, dy: float):
-        self._transform = self._model.get_transform_tool().gyro_mult(
-            self._model.get_transform_tool().create_translation_like(dx, dy), self._transform)
+        self.compose(self._model.get_transform_tool().create_translation_like(dx, dy))
 
     def rotate(self, angle: float):
-        self._transform = self._model.get_transform_tool().gyro_mult(
-            self._model.get_transform_tool().create_rotation_like(angle), self._transform)
+        self.compose(self._model.get_transform_tool().create_rotation_like(angle))
 
+    @_synchronized
     def add_scene_item(self, scene_item: SceneItem):
-        if any(k not in self._points for k in scene_item.keys):
+        """
+        :param scene_item: its keys may be point handles or names, see create_named_point_reference
+        """
+        handles = []
+
+        for key in scene_item.keys:
+            try:
+                handles.append(self.get_handle(key))
+            except KeyError:
+                raise ValueError(f"Scene item references point {key!r} which is not in the scene") from None
+
+        self._scene_items[scene_item] = None
+        self._revision += 1
+
+        if isinstance(scene_item, SceneLineSegment):
+            self._segment_positions[scene_item] = len(self._segment_items)
+            self._segment_indices.append((handles[0], handles[1]))
+            self._segment_items.append(scene_item)
+            self._segment_index_array = None
+
+    @_synchronized
+    def add_line_segments(self, p0: numpy.ndarray, p1: numpy.ndarray) -> typing.List[SceneLineSegment]:
+        """
+        Bulk variant of add_scene_item for line segments.
+        :param p0: handles of the first end point of each segment
+        :param p1: handles of the second end point of each segment
+        :return: the created scene items
+        """
+        p0 = numpy.asarray(p0, dtype=numpy.intp).reshape(-1)
+        p1 = numpy.asarray(p1, dtype=numpy.intp).reshape(-1)
+
+        keys = numpy.concatenate((p0, p1))
+        if len(keys) > 0 and (keys.min() < 0 or keys.max() >= self._point_count or
+                              not self._free_handles.isdisjoint(keys.tolist())):
             raise ValueError("Scene item references points outside the scene")
 
-        self._scene_items.append(scene_item)
+        indices = list(zip(p0.tolist(), p1.tolist()))
+        items = [SceneLineSegment(a, b) for a, b in indices]
+        position = len(self._segment_items)
+
+        self._scene_items.update(dict.fromkeys(items))
+        self._segment_positions.update(zip(items, range(position, position + len(items))))
+        self._segment_indices.extend(indices)
+        self._segment_items.extend(items)
+        self._segment_index_array = None
+        self._revision += 1
+
+        return items
+
+    @_synchronized
+    def remove_scene_item(self, scene_item: SceneItem):
+        del self._scene_items[scene_item]
+        self._revision += 1
+
+        if isinstance(scene_item, SceneLineSegment):
+            # move the last segment into the freed position
+            position = self._segment_positions.pop(scene_item)
+            last_item = self._segment_items.pop()
+            last_indices = self._segment_indices.pop()
+
+            if last_item is not scene_item:
+                self._segment_items[position] = last_item
+                self._segment_indices[position] = last_indices
+                self._segment_positions[last_item] = position
+
+            self._segment_index_array = None
 
-    def get_renderable_entities(self) -> typing.Iterator[euclidean_2d.entities.Euclidean2D]:
-        for item in self._scene_items:
-            geom = item.get_concrete_geometry(self)
-            yield geom.get_euclidean_representation()
+    def get_renderable_entities(self, min_size: float = 0.0) -> typing.Iterator[euclidean_2d.entities.Euclidean2D]:
+        """
+        :param min_size: see get_renderable_arcs
+        """
+        # evaluated up front under the lock, the caller consumes a consistent snapshot
+        with self._lock:
+            key = (self._transform_generation, self._revision)
+
+            if self._entities_cache is None or self._entities_cache[0] != key:
+                # evaluate the scene transform for all points up front, items then read from the cache
+                self.get_transformed_points()
+
+                self._entities_cache = key, [item.get_concrete_geometry(self).get_euclidean_representation()
+                                             for item in self._scene_items
+                                             if not isinstance(item, SceneLineSegment)]
+
+            entities = self._entities_cache[1]
+            arcs = self.get_renderable_arcs(min_size)
+
+        yield from entities
+        yield from arcs
 
         #for s in self._points.keys():
         #    yield self.point_value(s).get_euclidean_representation()
 
-    def create_point_reference(self) -> str:
-        key = str(uuid.uuid4())
+    @_synchronized
+    def get_renderable_arcs(self, min_size: float = 0.0) -> euclidean_2d.entities.ArcArray:
+        """
+        Evaluate the euclidean representation of every line segment in the scene in a single batch.
+        :param min_size: segments whose transformed end points are closer than this on the disk are culled before
+        evaluation. With the transform pushing most of a tiling towards the boundary this is typically the bulk
+        of the segments, see Canvas.to_disk_length for choosing a pixel threshold.
+        :return: the result is reused until the transform, the scene or min_size changes and must not be modified
+        """
+        key = (self._transform_generation, self._revision, min_size)
+
+        if self._arcs_cache is not None and self._arcs_cache[0] == key:
+            return self._arcs_cache[1]
+
+        if self._segment_index_array is None:
+            self._segment_index_array = numpy.array(self._segment_indices, dtype=numpy.intp).reshape(-1, 2).T
+
+        points = self.get_transformed_points()
+
+        with self.stats.timer("arcs"):
+            p0_indices = self._segment_index_array[0]
+            p1_indices = self._segment_index_array[1]
+
+            if min_size > 0:
+                # the chord is a lower bound on the euclidean size of the arc
+                visible = numpy.abs(points[p1_indices] - points[p0_indices]) >= min_size
+                p0_indices = p0_indices[visible]
+                p1_indices = p1_indices[visible]
+
+            self.stats.count("items_evaluated", len(p0_indices))
+            self.stats.count("items_culled", len(self._segment_indices) - len(p0_indices))
+
+            arcs = PoincareModelLineSegment.get_euclidean_representation_batch(points, p0_indices, p1_indices)
+
+        self._arcs_cache = key, arcs
+
+        return arcs
+
+    @_synchronized
+    def get_transformed_points(self) -> numpy.ndarray:
+        """
+        :return: (N,) complex array of all point values with the scene transform applied, indexed by point
+        handle. The result is cached until the transform or the point set changes and must not be modified.
+        """
+        if self._transformed_points is None:
+            with self.stats.timer("points"):
+                self._transformed_points = self._model.get_transform_tool().apply_to_disk_points(
+                    self._transform, self._points[:self._point_count])
+
+        return self._transformed_points
+
+    @_synchronized
+    def _append_point(self, z: complex) -> int:
+        self._revision += 1
+
+        if len(self._free_handles) > 0:
+            index = self._free_handles.pop()
+            self._points[index] = z
+            self._transformed_points = None
+            return index
+
+        if self._point_count == len(self._points):
+            grown = numpy.zeros(2 * len(self._points), dtype=numpy.complex128)
+            grown[:self._point_count] = self._points[:self._point_count]
+            self._points = grown
 
+        index = self._point_count
+        self._points[index] = z
+        self._point_count += 1
+        self._transformed_points = None
+
+        return index
+
+    @_synchronized
+    def create_point_reference(self) -> PointHandle:
         # remove any coordinate offset to store the underlying point value
-        point = self._model.get_factory().create_point()
+        tool = self._model.get_transform_tool()
+        z = tool.apply_to_disk_points(tool.get_inverse(self._transform), numpy.zeros(1, dtype=numpy.complex128))
+
+        return self._append_point(complex(z[0]))
+
+    def create_underlying_point_reference(self, z: complex) -> PointHandle:
+        """
+        Create a point from its underlying value, i.e. disk coordinates before the scene transform is applied.
+        """
+        return self._append_point(z)
+
+    @_synchronized
+    def create_underlying_point_references(self, values: numpy.ndarray) -> numpy.ndarray:
+        """
+        Bulk variant of create_underlying_point_reference. The points are appended after the existing ones,
+        free handles are not reused.
+        :return: the handles of the points, in the order of values
+        """
+        values = numpy.asarray(values, dtype=numpy.complex128).reshape(-1)
+        count = self._point_count + len(values)
+
+        if count > len(self._points):
+            capacity = len(self._points)
+            while capacity < count:
+                capacity *= 2
+
+            grown = numpy.zeros(capacity, dtype=numpy.complex128)
+            grown[:self._point_count] = self._points[:self._point_count]
+            self._points = grown
+
+        handles = numpy.arange(self._point_count, count)
+
+        self._points[self._point_count:count] = values
+        self._point_count = count
+        self._transformed_points = None
+        self._revision += 1
+
+        return handles
 
-        point.apply_transform(self._model.get_transform_tool().get_inverse(self._transform))
+    @_synchronized
+    def create_named_point_reference(self, name: typing.Optional[str] = None) -> str:
+        """
+        String keyed variant of create_point_reference, kept for compatibility. Methods accepting a PointKey
+        resolve the name, as does add_scene_item for the keys of scene items.
+        :param name: key for the point, a uuid is generated if not specified
+        """
+        if name is None:
+            name = str(uuid.uuid4())
+
+        if name in self._point_names:
+            raise ValueError("Point name is already in use")
+
+        self._point_names[name] = self.create_point_reference()
+
+        return name
+
+    @_synchronized
+    def remove_point(self, key: PointKey):
+        """
+        Remove a point, its handle may be reused by points created later. The point should no longer be
+        referenced by any scene item.
+        """
+        index = self.get_handle(key)
+
+        if isinstance(key, str):
+            del self._point_names[key]
+
+        self._free_handles.add(index)
+        self._points[index] = 0
+        self._revision += 1
 
-        self._points[key] = point
+    def get_handle(self, key: PointKey) -> PointHandle:
+        if isinstance(key, str):
+            return self._point_names[key]
+
+        if key < 0 or key >= self._point_count or key in self._free_handles:
+            raise KeyError(key)
 
         return key
 
-    def modify_underlying_point(self, key: str, modifier: typing.Callable[[HyperbolicModelEntity], None]):
+    @_synchronized
+    def underlying_point_value(self, key: PointKey) -> complex:
+        """
+        :return: the disk coordinates of the point before the scene transform is applied
+        """
+        return complex(self._points[self.get_handle(key)])
+
+    @_synchronized
+    def underlying_point_values(self, handles: typing.Sequence[PointHandle]) -> numpy.ndarray:
+        """
+        :return: complex array of the untransformed disk coordinates of the points
+        """
+        return self._points[:self._point_count][numpy.asarray(handles, dtype=numpy.intp)]
+
+    @_synchronized
+    def modify_underlying_point(self, key: PointKey, modifier: typing.Callable[[HyperbolicModelEntity], None]):
         """
         Modify the point before any scene transform is applied.
         """
-        modifier(self._points[key])
+        index = self.get_handle(key)
+        z = self._points[index]
+
+        point = self._model.get_factory().create_point_at(z.real, z.imag)
+        modifier(point)
+
+        self._points[index] = complex(*point.get_euclidean_representation())
+        self._transformed_points = None
+        self._revision += 1
 
-    def point_value(self, key: str) -> HyperbolicModelEntity:
+    @_synchronized
+    def point_value(self, key: PointKey) -> HyperbolicModelEntity:
         """
         Perform the scene geometry transform and return the point value.
         """
-        point = copy(self._points[key])
-        point.apply_transform(self._transform)
-        return point
+        z = self.get_transformed_points()[self.get_handle(key)]
 
+        return self._model.get_factory().create_point_at(z.real, z.imag)
@@ -1,284 +1,447 @@
 from __future__ import annotations
 
+import cmath
+import heapq
 import math
 import typing
-from copy import copy
-from enum import Enum
 
 import numpy
 
-from post_euclid.hyperbolic_2d.scene import Scene, SceneLineSegment, SceneItem
+from post_euclid.hyperbolic_2d.poincare.poincare import PoincareModelReflection, PoincareModelTransformTool, \
+    T_Transform
+from post_euclid.hyperbolic_2d.scene import Scene, SceneLineSegment, SceneItem, PointHandle
+from post_euclid.hyperbolic_2d.vertex_index import VertexIndex
 
 
-def _create_mirrored_point(scene: Scene, p: str, p0: str, p1: str) -> str:
-    with scene:
-        # to mirror about an edge
-        # translate such that p0 at origin
-        p0e = scene.point_value(p0).get_euclidean_representation()
+def fundamental_polygon(p: int, q: int) -> typing.List[complex]:
+    """
+    :return: the vertices of the {p, q} polygon centered on the origin, in clockwise order starting at the bottom
+    """
+    # based off "constructCenterPolygon" defined in http://aleph0.clarku.edu/~djoyce/poincare/Polygon.java
+    a = math.pi / p
+    b = math.pi / q
+    c = math.pi / 2
 
-        scene.translate(-p0e.x, -p0e.y)
+    sin_a = math.sin(a)
+    sin_b = math.sin(b)
 
-        # rotate such that p1 is on x axis
-        p0e_new = scene.point_value(p0).get_euclidean_representation()
-        if math.hypot(p0e_new.x, p0e_new.y) != 0:
-            raise ValueError()
+    radius = math.sin(c - b - a) / math.sqrt(1 - sin_b * sin_b - sin_a * sin_a)
 
-        p1e = scene.point_value(p1).get_euclidean_representation()
+    return [-1j * radius * cmath.exp(-1j * math.radians(i * 360 / p)) for i in range(0, p)]
 
-        angle = math.atan2(p1e.y, p1e.x)
-        scene.rotate(-angle)
 
-        p0e = scene.point_value(p0).get_euclidean_representation()
-        if math.hypot(p0e.x, p0e.y) != 0:
-            raise ValueError()
+def check_hyperbolic(p: int, q: int):
+    """
+    :raise ValueError: if p-gons meeting q at each vertex do not tile the hyperbolic plane
+    """
+    if (p - 2) * (q - 2) <= 4:
+        raise ValueError("{p, q} does not tile the hyperbolic plane, (p - 2) * (q - 2) should exceed 4")
 
-        p1e = scene.point_value(p1).get_euclidean_representation()
-        if p1e.y > 10e-15:
-            raise ValueError()
 
-        p = scene.point_value(p).get_euclidean_representation()
-        scene.translate(-p.x, p.y)
-        return scene.create_point_reference()
+_MOBIUS = PoincareModelTransformTool()
 
 
-class EdgeTransform:
+def _mobius_through(z: typing.Sequence[complex], w: typing.Sequence[complex]) -> T_Transform:
     """
-    Transform applied to a polygon based on the points of an
-    edge
+    :return: the normalized mobius transform taking the three points z to the three points w
+    """
+    def to_standard(z1, z2, z3):
+        # takes z1, z2, z3 to 0, 1, infinity
+        return (z2 - z3,    -z1 * (z2 - z3),
+                z2 - z1,    -z3 * (z2 - z1))
 
-    transform is applied to a polygon about the edge,
-    either in the form of a rotation or a reflection
+    return _MOBIUS.normalize(_MOBIUS.gyro_mult(_MOBIUS.get_inverse(to_standard(*w)), to_standard(*z)))
 
-    - in the case of a reflection, all points of the
-    polygon EXCEPT the edge points are transformed
-    to generate new points.
-        procedure:
-            if edge shares no points, 2 new points generated
-            if edge shares one point, 1 new point generated
 
-    - in case of rotation, rotation is about p0, the resulting
-    polygon has new vertices EXCEPT for p0
+class SceneVertexGenerator:
+    """
+    Ensures the uniqueness of generated vertices, points within tolerance
+    (hyperbolic distance) of an existing vertex resolve to its key.
     """
 
-    class Type(Enum):
-        ROTATION = 0
-        MIRROR = 1
-
-    def __init__(self, type: EdgeTransform.Type):
-        self._type = type
+    def __init__(self, scene: Scene, tolerance: float = 1e-6):
+        self._scene = scene
+        self._index: VertexIndex[PointHandle] = VertexIndex(tolerance)
 
-    def generate(self, polygon_edge: PolygonEdge, scene: Scene) -> Polygon:
-        if self._type == EdgeTransform.Type.MIRROR:
-            return self._generate_mirror(polygon_edge, scene)
-        else:
-            return self._generate_rotation(scene)
+        # number of polygons using each vertex, see acquire / release
+        self._references: typing.Dict[PointHandle, int] = {}
 
-    def _generate_mirror(self, polygon_edge: PolygonEdge, scene: Scene) -> Polygon:
-        p0 = polygon_edge.p0
-        p1 = polygon_edge.p1
-        points = (p0, p1)
-        polygon_edges = [p for p in polygon_edge.polygon.edges]
-        offset_index = polygon_edges.index(polygon_edge)
-        # always start with the edge matching the current polygon_edge
+    def rebuild(self):
+        """
+        Re-index the generated vertices from their current underlying values, e.g. after Scene.rebase
+        """
+        handles = [key for _, key in self._index.items()]
+        values = self._scene.underlying_point_values(handles).tolist()
 
-        edges = []
+        self._index = VertexIndex(self._index.tolerance)
+        for z, handle in zip(values, handles):
+            self._index.add(z, handle)
 
-        count = 0
-        for i in range(0, len(polygon_edges)):
-            edge = polygon_edges[(i + offset_index) % len(polygon_edges)]
+    @property
+    def scene(self) -> Scene:
+        return self._scene
 
-            if edge.p0 in points and edge.p1 in points:
-                # The edge is already inside the frontier that we are generating, prevent it from generating
-                # further entities
-                edges.append(PolygonEdge(edge.p0, edge.p1, True, *edge.transforms))
-            else:
-                # if edge has one common point, mirror the remaining point
-                if count == 0:
-                    m_p0 = polygon_edge.p0
-                else:
-                    m_p0 = edges[-1].p1
+    def create_point_reference(self, z: complex) -> PointHandle:
+        """
+        :param z: underlying (untransformed) disk coordinates of the vertex
+        """
+        return self._index.find_or_add(z, lambda: self._scene.create_underlying_point_reference(z))
 
-                if count == len(polygon_edges) - 1:
-                    m_p1 = polygon_edge.p0
-                else:
-                    m_p1 = _create_mirrored_point(scene, edge.p1, p0, p1)
+    def acquire(self, handle: PointHandle):
+        self._references[handle] = self._references.get(handle, 0) + 1
 
-                # edge is now re-enabled if the transform has exposed it to the frontier
-                edges.append(PolygonEdge(m_p0, m_p1, False, *edge.transforms))
+    def release(self, handle: PointHandle):
+        """
+        Drop a reference to the vertex, removing it from the scene once it is no longer referenced.
+        """
+        self._references[handle] -= 1
 
-            count += 1
+        if self._references[handle] == 0:
+            del self._references[handle]
+            self._index.remove(self._scene.underlying_point_value(handle), handle)
+            self._scene.remove_point(handle)
 
-        return Polygon(*edges)
 
-    def _generate_rotation(self, scene: Scene) -> Polygon:
-        raise NotImplementedError()
+class SceneEdgeGenerator:
+    """
+    Ensures the uniqueness of generated edges
+    """
 
+    def __init__(self, scene: Scene):
+        self._scene = scene
+        self._generated_edges: typing.Dict[typing.Tuple[PointHandle, PointHandle], SceneItem] = {}
+        self._references: typing.Dict[typing.Tuple[PointHandle, PointHandle], int] = {}
 
-class PolygonEdge:
+    def create_edge_scene_item(self, p0: PointHandle, p1: PointHandle):
+        """
+        Get or create the edge joining p0 and p1, each call takes a reference to it, see release_edge.
+        """
+        # handles are ordered, so one lookup covers both directions
+        key = (p0, p1) if p0 < p1 else (p1, p0)
 
-    def __init__(self, p0: str, p1: str, is_redundant: bool, *transforms: EdgeTransform):
-        self.p0 = p0
-        self.p1 = p1
-        self.is_redundant = is_redundant
+        self._references[key] = self._references.get(key, 0) + 1
 
-        self._polygon: typing.Optional[Polygon] = None
+        if key in self._generated_edges:
+            return self._generated_edges[key]
 
-        if self.p0 == self.p1:
-            raise ValueError("Points should be distinct")
+        ls = SceneLineSegment(p0, p1)
 
-        self.transforms = transforms
+        self._scene.add_scene_item(ls)
 
-    @property
-    def polygon(self) -> Polygon:
-        if self._polygon is None:
-            raise ValueError()
+        self._generated_edges[key] = ls
 
-        return self._polygon
+        return ls
 
-    def set_polygon(self, polygon: Polygon):
-        if self._polygon is not None:
-            raise ValueError()
+    def release_edge(self, p0: PointHandle, p1: PointHandle):
+        """
+        Drop a reference to the edge, removing it from the scene once it is no longer referenced.
+        """
+        key = (p0, p1) if p0 < p1 else (p1, p0)
 
-        self._polygon = polygon
+        self._references[key] -= 1
 
-    def is_connected_to(self, next_edge: PolygonEdge):
-        return self.p1 == next_edge.p0
+        if self._references[key] == 0:
+            del self._references[key]
+            self._scene.remove_scene_item(self._generated_edges.pop(key))
 
 
-class Polygon:
+class TilingPolygon:
+    """
+    Polygon of a tiling, identified by its vertex point handles.
+    Edge i joins vertices i and i + 1, neighbours[i] is the polygon across edge i if it has been generated.
+    transform is the poincare transform taking the fundamental polygon onto this one, vertex i being the
+    image of fundamental vertex i, in underlying disk coordinates.
+    """
 
-    def __init__(self, *edges: PolygonEdge):
-        # polygon edges consist of points
-        for i in range(0, len(edges)):
-            e0 = edges[i]
-            e1 = edges[(i + 1) % len(edges)]
+    def __init__(self,
+                 transform: T_Transform,
+                 vertices: typing.Tuple[PointHandle, ...],
+                 layer: int):
+        self.transform = transform
+        self.center = transform[1] / transform[3]
+        self.vertices = vertices
+        self.layer = layer
+        self.neighbours: typing.List[typing.Optional[TilingPolygon]] = [None] * len(vertices)
 
-            if not e0.is_connected_to(e1):
-                raise ValueError("Edges should be connected")
+    @property
+    def edges(self) -> typing.Iterator[typing.Tuple[PointHandle, PointHandle]]:
+        for i in range(0, len(self.vertices)):
+            yield self.vertices[i], self.vertices[(i + 1) % len(self.vertices)]
 
-        self._edges = edges
-        for e in self._edges:
-            e.set_polygon(self)
+    def edge_index(self, p0: PointHandle, p1: PointHandle) -> int:
+        """
+        :return: index of the edge joining p0 and p1, in either direction
+        """
+        for i, edge in enumerate(self.edges):
+            if edge == (p0, p1) or edge == (p1, p0):
+                return i
 
-    @property
-    def edges(self) -> typing.Iterator[PolygonEdge]:
-        for e in self._edges:
-            yield e
+        raise ValueError("Polygon has no such edge")
 
 
-class SceneEdgeGenerator:
+class Tiling:
     """
-    Ensures the uniqueness of generated edges
+    Regular {p, q} tiling of the hyperbolic plane: p-gons, q meeting at each vertex.
+
+    The tiling is grown breadth first from a central polygon. Layer n + 1 holds the polygons across an edge
+    from layer n which are not part of the tiling yet, the open edges of the last layer form the frontier.
+    Polygons are mirrored across their edges (see PoincareModelReflection) and identified by their centers,
+    so each polygon is produced exactly once. Each polygon is placed by its own transform of the fundamental
+    polygon rather than by mirroring the vertices of its parent, which would double their rounding error with
+    every layer until vertices no longer match those of their other neighbours.
+
+    The tiling follows Scene.rebase, after which radius is measured from the view center at the time of rebasing.
+
+    Alternatively update_view grows the tiling lazily wherever the view can see it and evicts polygons which
+    became too small to see, making the plane appear unbounded.
     """
 
-    def __init__(self, scene: Scene):
+    def __init__(self, scene: Scene, p: int, q: int, vertex_tolerance: float = 1e-6):
+        check_hyperbolic(p, q)
+
         self._scene = scene
-        self._generated_edges: typing.Dict[typing.Tuple[str, str], SceneItem] = {}
+        self._p = p
+        self._q = q
 
-    def create_edge_scene_item(self, p0: str, p1: str):
-        key = (p0, p1)
-        key_inv = (p1, p0)
+        self._vertices = SceneVertexGenerator(scene, vertex_tolerance)
+        self._edges = SceneEdgeGenerator(scene)
 
-        if key in self._generated_edges:
-            return self._generated_edges[key]
+        # polygon centers are much further apart than vertices, so the same tolerance is safe to use
+        self._centers: VertexIndex[TilingPolygon] = VertexIndex(vertex_tolerance)
 
-        if key_inv in self._generated_edges:
-            return self._generated_edges[key_inv]
+        self._polygons: typing.List[TilingPolygon] = []
+        self._frontier: typing.List[TilingPolygon] = []
+        self._layer_count = 0
 
-        ls = SceneLineSegment(p0, p1)
+        # the fundamental polygon, and the transform taking it onto its mirror image across edge i with the
+        # mirrored vertices in reversed order, so the neighbour across edge i of a polygon with transform t
+        # has transform t * self._mirror_transforms[i]
+        vertices = fundamental_polygon(p, q)
+        self._fundamental_vertices = numpy.array(vertices)
+        self._mirror_transforms = []
 
-        self._scene.add_scene_item(ls)
+        for i in range(0, p):
+            mirrored = PoincareModelReflection.reflect(
+                self._fundamental_vertices[::-1], vertices[i], vertices[(i + 1) % p])
+            self._mirror_transforms.append(_mobius_through(vertices[:3], mirrored[:3]))
 
-        self._generated_edges[key] = ls
+        self._mirror_centers = numpy.array([t[1] / t[3] for t in self._mirror_transforms])
 
+        # euclidean radius of the center polygon, i.e. of any polygon moved to the origin
+        self._polygon_radius = abs(vertices[0])
 
-class SpanningTreeNode:
+        scene.add_rebase_listener(self._on_rebase)
 
-    def __init__(self, parent: typing.Optional[SpanningTreeNode], polygon_edge: PolygonEdge):
-        self._parent = parent
-        self.polygon_edge = polygon_edge
-        self._child_nodes: typing.List[SpanningTreeNode] = []
+    @property
+    def p(self) -> int:
+        return self._p
 
-    def walk(self, callback: typing.Callable[[SpanningTreeNode], []]):
-        callback(self)
-        for n in self._child_nodes:
-            callback(n)
+    @property
+    def q(self) -> int:
+        return self._q
 
-        for n in self._child_nodes:
-            n.walk(callback)
+    @property
+    def polygons(self) -> typing.List[TilingPolygon]:
+        return self._polygons
 
-    def generate(self, scene: Scene, depth: int):
-        if depth == 0:
+    @property
+    def layer_count(self) -> int:
+        return self._layer_count
+
+    def generate(self, layers: typing.Optional[int] = None, radius: typing.Optional[float] = None):
+        """
+        Extend the tiling until it has the given number of layers, and/or until every polygon whose center
+        lies within the hyperbolic distance radius of the origin has been generated.
+        """
+        if layers is None and radius is None:
+            raise ValueError("Either layers or radius should be specified")
+
+        while len(self._frontier) > 0 or len(self._polygons) == 0:
+            if layers is not None and self.layer_count >= layers:
+                break
+
+            if len(self.generate_layer(radius)) == 0:
+                break
+
+    def generate_layer(self, radius: typing.Optional[float] = None) -> typing.List[TilingPolygon]:
+        """
+        Generate the next layer of polygons, limited to those centered within radius of the origin if specified.
+        :return: the polygons generated
+        """
+        if len(self._polygons) == 0:
+            layer = [self._create_center_polygon()]
+        else:
+            layer = []
+            max_center = math.inf if radius is None else math.tanh(radius / 2)
+
+            def include(centers: numpy.ndarray) -> numpy.ndarray:
+                return numpy.abs(centers) <= max_center
+
+            for polygon in self._frontier:
+                layer.extend(self._create_neighbours(polygon, include))
+
+        self._frontier = layer
+        return layer
+
+    def projected_sizes(self, centers: numpy.ndarray) -> numpy.ndarray:
+        """
+        :param centers: underlying polygon centers
+        :return: approximate euclidean radius of the polygons on the disk under the scene transform, the
+        radius at the origin scaled by the conformal factor at the transformed center
+        """
+        w = self._scene.model.get_transform_tool().apply_to_disk_points(self._scene.transform, centers)
+        return self._polygon_radius * (1 - (w.real * w.real + w.imag * w.imag))
+
+    def update_view(self, min_size: float, max_polygons: int = 20000,
+                    max_created: typing.Optional[int] = None) -> typing.Tuple[int, int]:
+        """
+        View driven generation. Evicts polygons projecting to less than half of min_size, then grows the tiling
+        into every region where polygons project to at least min_size, largest polygons first.
+        :param min_size: euclidean radius on the disk, see Canvas.to_disk_length
+        :param max_polygons: memory cap, the smallest polygons are evicted and growth stops beyond this
+        :param max_created: stop growing once this many polygons were created, calling again continues with the
+        largest remaining polygons. Splits a large update into steps, e.g. to interleave it with rendering
+        :return: the number of polygons created and evicted
+        """
+        if len(self._polygons) == 0:
+            self.generate_layer()
+
+        polygons = self._polygons
+        sizes = self.projected_sizes(numpy.array([polygon.center for polygon in polygons]))
+
+        # sizes in ascending order, polygons below half of min_size or beyond the cap go
+        order = numpy.argsort(sizes)
+        evict_count = max(int(numpy.searchsorted(sizes[order], min_size / 2)), len(order) - max_polygons)
+
+        evicted = set(polygons[i] for i in order[:evict_count].tolist())
+        self._remove_polygons(evicted)
+
+        def include(centers: numpy.ndarray) -> numpy.ndarray:
+            return self.projected_sizes(centers) >= min_size
+
+        # max heap of the polygons with open edges by size
+        heap = [(-size, id(polygon), polygon) for polygon, size in zip(polygons, sizes.tolist())
+                if polygon not in evicted and size >= min_size and None in polygon.neighbours]
+        heapq.heapify(heap)
+
+        created_count = 0
+
+        while len(heap) > 0 and len(self._polygons) < max_polygons and \
+                (max_created is None or created_count < max_created):
+            _, _, polygon = heapq.heappop(heap)
+
+            limit = max_polygons - len(self._polygons)
+            if max_created is not None:
+                limit = min(limit, max_created - created_count)
+
+            created = self._create_neighbours(polygon, include, limit)
+            created_count += len(created)
+
+            if len(created) > 0:
+                created_sizes = self.projected_sizes(numpy.array([c.center for c in created])).tolist()
+                for neighbour, size in zip(created, created_sizes):
+                    heapq.heappush(heap, (-size, id(neighbour), neighbour))
+
+        return created_count, len(evicted)
+
+    def _remove_polygons(self, polygons: typing.Set[TilingPolygon]):
+        if len(polygons) == 0:
             return
 
-        if self.polygon_edge.is_redundant:
-            # edge is already shared with another polygon, performing transform would generate overlaps
-            return
+        for polygon in polygons:
+            for neighbour in polygon.neighbours:
+                if neighbour is not None and neighbour not in polygons:
+                    neighbour.neighbours[neighbour.neighbours.index(polygon)] = None
 
-        if len(self._child_nodes) == 0:
-            # for each edge of the polygon edges generate a child node
-            for t in self.polygon_edge.transforms:
-                child_polygon = t.generate(self.polygon_edge, scene)
-                for edge in child_polygon.edges:
-                    self._child_nodes.append(SpanningTreeNode(self, edge))
+            self._centers.remove(polygon.center, polygon)
 
-        for child_node in self._child_nodes:
-            child_node.generate(scene, depth - 1)
+            for p0, p1 in polygon.edges:
+                self._edges.release_edge(p0, p1)
 
+            for vertex in polygon.vertices:
+                self._vertices.release(vertex)
 
-class Tiling_3_7:
-    """
-    Tiling of the hyperbolic plane,
-    data is stored as a spanning tree linked by edges.
+        self._polygons = [polygon for polygon in self._polygons if polygon not in polygons]
+        self._frontier = [polygon for polygon in self._frontier if polygon not in polygons]
 
-    Polygons are identified by a set of point pairs (edges)
-    """
+    def _on_rebase(self, transform):
+        self._vertices.rebuild()
 
-    def __init__(self, scene: Scene):
-        self._scene = scene
+        if len(self._polygons) == 0:
+            return
+
+        # the scene transform as a poincare transform, whichever model the scene uses
+        samples = [0j, 0.5 + 0j, 0.5j]
+        mobius = _mobius_through(samples, self._scene.model.get_transform_tool().apply_to_disk_points(
+            transform, numpy.array(samples)).tolist())
+
+        self._centers = VertexIndex(self._centers.tolerance)
+        for polygon in self._polygons:
+            polygon.transform = _MOBIUS.normalize(_MOBIUS.gyro_mult(mobius, polygon.transform))
+            polygon.center = polygon.transform[1] / polygon.transform[3]
+            self._centers.add(polygon.center, polygon)
+
+    def _add_polygon(self,
+                     transform: T_Transform,
+                     vertices: typing.Tuple[PointHandle, ...],
+                     layer: int) -> TilingPolygon:
+        polygon = TilingPolygon(transform, vertices, layer)
+
+        self._centers.add(polygon.center, polygon)
+        self._polygons.append(polygon)
+        self._layer_count = max(self._layer_count, layer + 1)
 
-    def generate(self):
-        # based off "constructCenterPolygon" defined in http://aleph0.clarku.edu/~djoyce/poincare/Polygon.java
+        for vertex in vertices:
+            self._vertices.acquire(vertex)
 
-        n = 4
-        k = 6
+        for p0, p1 in polygon.edges:
+            self._edges.create_edge_scene_item(p0, p1)
 
-        points = []
+        return polygon
 
-        a = math.pi / n
-        b = math.pi / k
-        c = math.pi / 2
+    def _create_center_polygon(self) -> TilingPolygon:
+        points = [self._vertices.create_point_reference(z) for z in self._fundamental_vertices.tolist()]
 
-        sin_a = math.sin(a)
-        sin_b = math.sin(b)
+        return self._add_polygon(_MOBIUS.create_identity(), tuple(points), 0)
 
-        radius = math.sin(c - b - a) / math.sqrt(1 - sin_b * sin_b - sin_a * sin_a)
+    def _create_neighbours(self,
+                           polygon: TilingPolygon,
+                           include: typing.Callable[[numpy.ndarray], numpy.ndarray],
+                           limit: typing.Optional[int] = None) -> typing.List[TilingPolygon]:
+        """
+        Link polygon to its neighbours across every open edge, creating them where needed.
+        :param include: given an array of neighbour centers, a mask of the neighbours to consider
+        :param limit: create at most this many neighbours, the edges left over stay open
+        """
+        centers = _MOBIUS.apply_to_array(polygon.transform, self._mirror_centers)
+        included = include(centers).tolist()
+        centers = centers.tolist()
 
-        for i in range(0, n):
-            angle = math.radians(i * 360 / n)
+        created = []
 
-            with self._scene:
-                self._scene.rotate(angle)
-                self._scene.translate(0, radius)
+        for i in range(0, self._p):
+            if polygon.neighbours[i] is not None or not included[i]:
+                continue
 
-                points.append(self._scene.create_point_reference())
+            edge_p0, edge_p1 = polygon.vertices[i], polygon.vertices[(i + 1) % self._p]
 
-        root_shape = Polygon(
-            PolygonEdge(points[0], points[1], False, EdgeTransform(EdgeTransform.Type.MIRROR)),
-            PolygonEdge(points[1], points[2], False, EdgeTransform(EdgeTransform.Type.MIRROR)),
-            PolygonEdge(points[2], points[3], False, EdgeTransform(EdgeTransform.Type.MIRROR)),
-            PolygonEdge(points[3], points[0], False, EdgeTransform(EdgeTransform.Type.MIRROR))
-        )
+            neighbour = self._centers.find(centers[i])
+            if neighbour is None:
+                if limit is not None and len(created) >= limit:
+                    continue
 
+                transform = _MOBIUS.normalize(_MOBIUS.gyro_mult(polygon.transform, self._mirror_transforms[i]))
+                values = _MOBIUS.apply_to_array(transform, self._fundamental_vertices).tolist()
 
-        scene_items = []
+                # mirroring reverses the winding, the shared edge is the reversed edge i
+                vertices = [self._vertices.create_point_reference(z) for z in values]
+                vertices[self._p - 1 - i] = edge_p0
+                vertices[(self._p - 2 - i) % self._p] = edge_p1
 
-        se = SceneEdgeGenerator(self._scene)
+                neighbour = self._add_polygon(transform, tuple(vertices), polygon.layer + 1)
+                created.append(neighbour)
 
-        tree = [SpanningTreeNode(None, e) for e in root_shape.edges]
-        for t in tree:
-            t.generate(self._scene, 2)
-            t.walk(lambda node: se.create_edge_scene_item(node.polygon_edge.p0, node.polygon_edge.p1))
+            polygon.neighbours[i] = neighbour
+            neighbour.neighbours[neighbour.edge_index(edge_p0, edge_p1)] = polygon
 
-        for i in scene_items:
-            self._scene.add_scene_item(i)
+        return created
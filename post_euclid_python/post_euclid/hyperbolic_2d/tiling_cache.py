@@ -0,0 +1,133 @@
+"""
+On disk cache of precomputed tilings, loaded through memory maps.
+"""
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+import typing
+from dataclasses import dataclass
+
+import numpy
+
+from post_euclid.hyperbolic_2d.group_tiling import TriangleGroupTiling, TileLayer, polygon_edges, polygon_adjacency
+from post_euclid.hyperbolic_2d.scene import Scene
+
+
+@dataclass(slots=True)
+class TilingMesh:
+    """
+    A tiling as flat arrays.
+
+    vertices: (V,) complex disk coordinates of the distinct vertices
+    edges: (E, 2) int32 vertex indices of every edge
+    polygons: (N, p) int32 vertex indices of each tile
+    adjacency: (N, p) int32 tile across each edge of each tile, see polygon_adjacency
+    transforms: (N, 2, 2) mobius matrices mapping the fundamental polygon onto each tile
+    """
+    vertices: numpy.ndarray
+    edges: numpy.ndarray
+    polygons: numpy.ndarray
+    adjacency: numpy.ndarray
+    transforms: numpy.ndarray
+
+    @staticmethod
+    def build(p: int, q: int, layers: int, vertex_tolerance: float = 1e-6,
+              workers: typing.Optional[int] = 1) -> TilingMesh:
+        """
+        :param workers: see TriangleGroupTiling.enumerate_parallel, 1 enumerates in this process
+        """
+        tiling = TriangleGroupTiling(p, q)
+        tile_layers = tiling.enumerate(layers) if workers == 1 else tiling.enumerate_parallel(layers, workers)
+
+        return TilingMesh.from_layers(tiling, tile_layers, vertex_tolerance)
+
+    @staticmethod
+    def from_layers(tiling: TriangleGroupTiling, layers: typing.Sequence[TileLayer],
+                    vertex_tolerance: float = 1e-6) -> TilingMesh:
+        transforms = TileLayer.concatenate(layers).transforms
+        vertices, polygons = tiling.tile_mesh(layers, vertex_tolerance)
+
+        return TilingMesh(vertices, polygon_edges(polygons), polygons, polygon_adjacency(polygons), transforms)
+
+    def add_to_scene(self, scene: Scene) -> numpy.ndarray:
+        """
+        Add the vertices and edges to the scene, as underlying points.
+        :return: the scene handle of each vertex
+        """
+        handles = scene.create_underlying_point_references(self.vertices)
+        scene.add_line_segments(handles[self.edges[:, 0]], handles[self.edges[:, 1]])
+
+        return handles
+
+
+class TilingCache:
+    """
+    Directory of tilings keyed by (p, q, layers, model), each stored as one .npy file per TilingMesh array.
+    Loaded arrays are read only memory maps, so loading costs next to nothing until the data is touched, and
+    processes loading the same tiling share its pages.
+    """
+
+    FORMAT_VERSION = 1
+
+    _ARRAYS = ("vertices", "edges", "polygons", "adjacency", "transforms")
+
+    def __init__(self, directory: typing.Optional[str] = None):
+        """
+        :param directory: defaults to $POST_EUCLID_CACHE, or ~/.cache/post_euclid
+        """
+        if directory is None:
+            directory = os.environ.get("POST_EUCLID_CACHE",
+                                       os.path.join(os.path.expanduser("~"), ".cache", "post_euclid"))
+
+        self._directory = directory
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    def path(self, p: int, q: int, layers: int, model: str) -> str:
+        return os.path.join(self._directory, f"tiling_v{TilingCache.FORMAT_VERSION}_{p}_{q}_{layers}_{model}")
+
+    def load(self, p: int, q: int, layers: int, model: str) -> typing.Optional[TilingMesh]:
+        """
+        :return: the cached tiling, or None if it is not in the cache
+        """
+        path = self.path(p, q, layers, model)
+
+        if not os.path.isdir(path):
+            return None
+
+        return TilingMesh(*(numpy.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+                            for name in TilingCache._ARRAYS))
+
+    def store(self, p: int, q: int, layers: int, model: str, mesh: TilingMesh):
+        os.makedirs(self._directory, exist_ok=True)
+
+        # written to a temporary directory and moved into place, so readers never see a partial tiling
+        staging = tempfile.mkdtemp(dir=self._directory)
+
+        try:
+            for name in TilingCache._ARRAYS:
+                numpy.save(os.path.join(staging, f"{name}.npy"), getattr(mesh, name))
+
+            os.replace(staging, self.path(p, q, layers, model))
+        except OSError:
+            # another process stored the same tiling first
+            shutil.rmtree(staging, ignore_errors=True)
+
+            if not os.path.isdir(self.path(p, q, layers, model)):
+                raise
+
+    def get(self, p: int, q: int, layers: int, model: str, workers: typing.Optional[int] = 1) -> TilingMesh:
+        """
+        Load the tiling, building and storing it first if it is not in the cache.
+        """
+        mesh = self.load(p, q, layers, model)
+
+        if mesh is None:
+            self.store(p, q, layers, model, TilingMesh.build(p, q, layers, workers=workers))
+            mesh = self.load(p, q, layers, model)
+
+        return mesh
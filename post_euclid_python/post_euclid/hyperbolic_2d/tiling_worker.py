@@ -0,0 +1,134 @@
+"""
+Generation of a TriangleGroupTiling into a scene on a background thread.
+"""
+from __future__ import annotations
+
+import threading
+import typing
+
+import numpy
+
+from post_euclid.hyperbolic_2d.group_tiling import TriangleGroupTiling, TileLayer, polygon_edges
+from post_euclid.hyperbolic_2d.scene import Scene
+from post_euclid.hyperbolic_2d.vertex_index import VertexIndex, merge_points
+
+
+class TilingWorker:
+    """
+    Adds the tiles of a fixed number of layers of a TriangleGroupTiling to the scene from a background thread,
+    a chunk at a time, while the scene is rendered and interacted with from the main thread.
+
+    Each chunk is evaluated and merged with the vertices of earlier chunks without holding the scene lock, only
+    appending its new points and edges takes the lock, so a render reads either all of a chunk or none of it.
+    The worker only ever appends to the scene, it should not share the scene with a lazily grown Tiling.
+    """
+
+    def __init__(self,
+                 scene: Scene,
+                 tiling: TriangleGroupTiling,
+                 layers: int,
+                 chunk_size: int = 2000,
+                 vertex_tolerance: float = 1e-6,
+                 on_done: typing.Optional[typing.Callable[[typing.List[TileLayer]], None]] = None):
+        """
+        :param on_done: called from the worker thread with the generated layers once all tiles are added,
+        not if the worker is cancelled
+        """
+        self._scene = scene
+        self._tiling = tiling
+        self._layers = layers
+        self._chunk_size = chunk_size
+        self._on_done = on_done
+
+        # vertices generated so far in the tiling's own coordinates, keyed by worker vertex id. Vertex ids are
+        # mapped to scene handles by _handles
+        self._index: VertexIndex[int] = VertexIndex(vertex_tolerance)
+        self._vertex_count = 0
+        self._handles = numpy.zeros(0, dtype=numpy.intp)
+        self._edges: typing.Set[typing.Tuple[int, int]] = set()
+
+        # rebases applied to the scene since the worker started, new points are moved along with the others
+        tool = scene.model.get_transform_tool()
+        self._offset = tool.create_identity()
+        scene.add_rebase_listener(self._on_rebase)
+
+        self._tile_count = 0
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="TilingWorker", daemon=True)
+
+    @property
+    def tile_count(self) -> int:
+        """
+        :return: the number of tiles added to the scene so far
+        """
+        return self._tile_count
+
+    @property
+    def done(self) -> bool:
+        return not self._thread.is_alive()
+
+    def start(self):
+        self._thread.start()
+
+    def cancel(self):
+        """
+        Stop after the chunk in progress, tiles already added stay in the scene.
+        """
+        self._cancelled.set()
+
+    def join(self, timeout: typing.Optional[float] = None):
+        self._thread.join(timeout)
+
+    def _on_rebase(self, transform):
+        # called with the scene lock held
+        tool = self._scene.model.get_transform_tool()
+        self._offset = tool.gyro_mult(transform, self._offset)
+
+    def _run(self):
+        generated = []
+
+        for layer in self._tiling.iterate(self._layers):
+            generated.append(layer)
+
+            for start in range(0, len(layer), self._chunk_size):
+                if self._cancelled.is_set():
+                    return
+
+                self._add_tiles(layer.transforms[start:start + self._chunk_size])
+
+        if self._on_done is not None:
+            self._on_done(generated)
+
+    def _add_tiles(self, transforms: numpy.ndarray):
+        vertices, indices = merge_points(self._tiling.tile_vertices(transforms), self._index.tolerance)
+
+        # resolve the chunk's vertices against those of earlier chunks
+        ids = numpy.empty(len(vertices), dtype=numpy.intp)
+        new_vertices = []
+
+        for i, z in enumerate(vertices.tolist()):
+            vertex_id = self._index.find(z)
+
+            if vertex_id is None:
+                vertex_id = self._vertex_count + len(new_vertices)
+                new_vertices.append(z)
+                self._index.add(z, vertex_id)
+
+            ids[i] = vertex_id
+
+        edges = ids[polygon_edges(indices.reshape(-1, self._tiling.p))]
+        edges.sort(axis=1)
+
+        new_edges = [e for e in map(tuple, edges.tolist()) if e not in self._edges]
+        self._edges.update(new_edges)
+        new_edges = numpy.array(new_edges, dtype=numpy.intp).reshape(-1, 2)
+
+        with self._scene.lock:
+            tool = self._scene.model.get_transform_tool()
+            points = tool.apply_to_disk_points(self._offset, numpy.array(new_vertices, dtype=numpy.complex128))
+
+            self._handles = numpy.concatenate((self._handles, self._scene.create_underlying_point_references(points)))
+            self._scene.add_line_segments(self._handles[new_edges[:, 0]], self._handles[new_edges[:, 1]])
+
+        self._vertex_count += len(new_vertices)
+        self._tile_count += len(transforms)
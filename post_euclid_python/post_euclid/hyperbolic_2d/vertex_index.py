@@ -0,0 +1,130 @@
+"""
+Spatial lookup of points on the poincare disk by hyperbolic position
+"""
+from __future__ import annotations
+
+import math
+import typing
+from typing import TypeVar, Generic
+
+import numpy
+
+
+K = TypeVar("K")
+
+
+class VertexIndex(Generic[K]):
+    """
+    Spatial hash over poincare disk coordinates. Points lying within a hyperbolic distance of tolerance
+    of a previously added point resolve to that point's key.
+    """
+
+    def __init__(self, tolerance: float = 1e-6):
+        if tolerance <= 0:
+            raise ValueError("Tolerance should be positive")
+
+        self._tolerance = tolerance
+
+        # the hyperbolic metric is at least twice the euclidean one on the disk, so points within tolerance
+        # are never more than one cell apart
+        self._cell_size = tolerance
+
+        # cosh(tolerance) - 1, written to keep precision for small tolerances
+        self._threshold = 2 * math.sinh(tolerance / 2) ** 2
+
+        self._cells: typing.Dict[typing.Tuple[int, int], typing.List[typing.Tuple[complex, K]]] = {}
+        self._count = 0
+
+    @property
+    def tolerance(self) -> float:
+        return self._tolerance
+
+    def __len__(self):
+        return self._count
+
+    def _cell(self, z: complex) -> typing.Tuple[int, int]:
+        return math.floor(z.real / self._cell_size), math.floor(z.imag / self._cell_size)
+
+    def _within_tolerance(self, a: complex, b: complex) -> bool:
+        # cosh(d) - 1 for the hyperbolic distance d between a and b
+        d = a - b
+        denom = (1 - (a.real * a.real + a.imag * a.imag)) * (1 - (b.real * b.real + b.imag * b.imag))
+        return 2 * (d.real * d.real + d.imag * d.imag) <= self._threshold * denom
+
+    def find(self, z: complex) -> typing.Optional[K]:
+        """
+        :return: the key of a point within tolerance of z, or None if there is no such point
+        """
+        cx, cy = self._cell(z)
+
+        for x in (cx - 1, cx, cx + 1):
+            for y in (cy - 1, cy, cy + 1):
+                for point, key in self._cells.get((x, y), ()):
+                    if self._within_tolerance(z, point):
+                        return key
+
+        return None
+
+    def items(self) -> typing.Iterator[typing.Tuple[complex, K]]:
+        for cell in self._cells.values():
+            yield from cell
+
+    def add(self, z: complex, key: K):
+        self._cells.setdefault(self._cell(z), []).append((z, key))
+        self._count += 1
+
+    def remove(self, z: complex, key: K):
+        """
+        Remove the entry added for z with the given key, z should be exactly the value it was added with.
+        """
+        cell = self._cells[self._cell(z)]
+        cell.remove((z, key))
+
+        if len(cell) == 0:
+            del self._cells[self._cell(z)]
+
+        self._count -= 1
+
+    def find_or_add(self, z: complex, create_key: typing.Callable[[], K]) -> K:
+        """
+        :return: the key of a point within tolerance of z, if there is none the key returned by create_key
+        is added for z.
+        """
+        key = self.find(z)
+
+        if key is None:
+            key = create_key()
+            self.add(z, key)
+
+        return key
+
+
+def merge_points(points: numpy.ndarray, tolerance: float = 1e-6) -> typing.Tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    Merge points lying within a hyperbolic distance of tolerance of each other, as VertexIndex.
+    :param points: complex array of disk coordinates
+    :return: the merged points, and for each input point the int32 index of the merged point it resolves to
+    """
+    points = numpy.asarray(points, dtype=numpy.complex128).reshape(-1)
+
+    # copies of a point computed along different paths differ in the last few bits, collapse them on a fine
+    # grid first so that the index only sees one copy in most cases
+    step = tolerance * 1e-3
+    keys = numpy.round(points.real / step) + 1j * numpy.round(points.imag / step)
+    _, first, inverse = numpy.unique(keys, return_index=True, return_inverse=True)
+
+    index: VertexIndex[int] = VertexIndex(tolerance)
+    merged: typing.List[complex] = []
+    mapping = numpy.empty(len(first), dtype=numpy.int32)
+
+    for i, z in enumerate(points[first].tolist()):
+        key = index.find(z)
+
+        if key is None:
+            key = len(merged)
+            merged.append(z)
+            index.add(z, key)
+
+        mapping[i] = key
+
+    return numpy.array(merged, dtype=numpy.complex128), mapping[inverse.reshape(-1)]
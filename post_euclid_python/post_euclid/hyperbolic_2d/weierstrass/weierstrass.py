@@ -59,6 +59,61 @@ class WeierstrassModelTransformTool(HyperbolicModelTransformTool[T_Transform]):
     def get_inverse(self, trsf: T) -> T_Transform:
         return numpy.linalg.inv(trsf)
 
+    def normalize(self, trsf: T_Transform) -> T_Transform:
+        """
+        Gram-Schmidt orthonormalize the columns with respect to the minkowski inner product
+        (-x0 * x1 + y0 * y1 + z0 * z1), giving a Lorentz transform preserving the hyperboloid.
+        """
+        def dot(u, v):
+            return -u[0] * v[0] + u[1] * v[1] + u[2] * v[2]
+
+        t = numpy.array(trsf, dtype=numpy.float64)
+
+        # put the image of the origin back on the hyperboloid as in WeierstrassModelPoint.apply_transform,
+        # rescaling by the norm would cancel badly far from the origin
+        c0 = t[:, 0].copy()
+        c0[0] = math.sqrt(c0[1] * c0[1] + c0[2] * c0[2] + 1.0)
+
+        c1 = t[:, 1] + dot(t[:, 1], c0) * c0
+        c1 = c1 / math.sqrt(dot(c1, c1))
+
+        c2 = t[:, 2] + dot(t[:, 2], c0) * c0 - dot(t[:, 2], c1) * c1
+        c2 = c2 / math.sqrt(dot(c2, c2))
+
+        return numpy.stack((c0, c1, c2), axis=1)
+
+    def from_disk_points(self, points: numpy.ndarray) -> numpy.ndarray:
+        """
+        :return: (3, N) array of (x, y, z) hyperboloid coordinates, see WeierstrassModelPoint.as_poincare_point
+        for the (swapped) axis convention
+        """
+        points = numpy.asarray(points, dtype=numpy.complex128)
+
+        rr = points.real * points.real + points.imag * points.imag
+        scale = 2.0 / (1.0 - rr)
+
+        return numpy.stack((
+            (1.0 + rr) / (1.0 - rr),
+            points.imag * scale,
+            points.real * scale
+        ))
+
+    def to_disk_points(self, coords: numpy.ndarray) -> numpy.ndarray:
+        frac = 1.0 / (coords[0] + 1.0)
+
+        return coords[2] * frac + 1j * coords[1] * frac
+
+    def apply_to_array(self, trsf: T_Transform, coords: numpy.ndarray) -> numpy.ndarray:
+        """
+        :param coords: (3, N) array of hyperboloid coordinates, see from_disk_points
+        """
+        vec = numpy.matmul(trsf, coords)
+
+        # project x back onto the hyperboloid to stop drift accumulating, as in WeierstrassModelPoint
+        vec[0] = numpy.sqrt(vec[1] * vec[1] + vec[2] * vec[2] + 1.0)
+
+        return vec
+
 
 class WeierstrassHyperbolicModelEntity(HyperbolicModelEntity[T_Transform]):
     pass
@@ -75,12 +130,13 @@ class WeierstrassModelPoint(WeierstrassHyperbolicModelEntity):
         return self.as_poincare_point().get_euclidean_representation()
 
     def apply_transform(self, model_transfrom: T_Transform):
-        original = numpy.array([self.x, self.y, self.z])
-        vec = numpy.matmul(model_transfrom, original)
+        # plain floats, numpy's per call overhead dominates for a single 3-vector
+        (t00, t01, t02), (t10, t11, t12), (t20, t21, t22) = model_transfrom.tolist()
+        x, y, z = self.x, self.y, self.z
 
-        self.x = vec[0]
-        self.y = vec[1]
-        self.z = vec[2]
+        self.x = t00 * x + t01 * y + t02 * z
+        self.y = t10 * x + t11 * y + t12 * z
+        self.z = t20 * x + t21 * y + t22 * z
 
         # x**2 == y** 2 + z** 2 + 1
         yy = self.y ** 2
@@ -128,6 +184,10 @@ class WeierstrassModelFactory(HyperbolicModelEntityFactory[
     def create_point(self) -> WeierstrassModelPoint:
         return WeierstrassModelPoint(0, 0)
 
+    def create_point_at(self, x: float, y: float) -> WeierstrassModelPoint:
+        scale = 2.0 / (1.0 - x * x - y * y)
+        return WeierstrassModelPoint(y * scale, x * scale)
+
     def create_line_segment(self, p0: WeierstrassModelPoint, p1: WeierstrassModelPoint) -> (
             WeierstrassModelLineSegment):
         return WeierstrassModelLineSegment(p0, p1)
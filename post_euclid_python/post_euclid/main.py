@@ -1,75 +1,274 @@
+import asyncio
+import os
+import sys
 import time
 import typing
 
+import numpy
 import pyglet
 from pyglet.window.key import MOTION_LEFT, MOTION_RIGHT, MOTION_UP, MOTION_DOWN
 
 from post_euclid import euclidean_2d
-from post_euclid.euclidean_2d import entities
-from post_euclid.hyperbolic_2d.poincare.poincare import PoincareHyperbolicModel
-from post_euclid.hyperbolic_2d.scene import Scene, SceneLineSegment
-from post_euclid.hyperbolic_2d.tiling import Tiling_3_7
-from post_euclid.hyperbolic_2d.weierstrass.weierstrass import WeierstrassHyperbolicModel
+from post_euclid.hyperbolic_2d.hyperbolic_model_entity import HyperbolicModel
+from post_euclid.hyperbolic_2d.scene import Scene
 from post_euclid.rendering.canvas import Canvas
 
 
-def main():
-    model = PoincareHyperbolicModel()
-    scene = Scene(model)
+def create_model(name: str) -> HyperbolicModel:
+    # only the selected model is imported
+    if name == "poincare":
+        from post_euclid.hyperbolic_2d.poincare.poincare import PoincareHyperbolicModel
+        return PoincareHyperbolicModel()
+
+    if name == "weierstrass":
+        from post_euclid.hyperbolic_2d.weierstrass.weierstrass import WeierstrassHyperbolicModel
+        return WeierstrassHyperbolicModel()
+
+    raise ValueError(f"Unknown model {name}")
+
+
+class _TilingStream:
+    """
+    Generates a fixed number of layers of a TriangleGroupTiling from the pyglet clock, a chunk of tiles per
+    tick, so that the window is responsive while the tiling comes in. on_tiles is called with the transforms
+    of each chunk, on_done with all layers once they are generated.
+    """
+
+    def __init__(self, tiling, layers: int, chunk_size: int,
+                 on_tiles: typing.Callable[[typing.Any], None],
+                 on_done: typing.Callable[[typing.List[typing.Any]], None]):
+        self._layers = tiling.iterate(layers)
+        self._chunk_size = chunk_size
+        self._on_tiles = on_tiles
+        self._on_done = on_done
+
+        self._generated = []
+        self._layer = None
+        self._position = 0
+
+        pyglet.clock.schedule(self._step)
+
+    def _step(self, dt):
+        if self._layer is None or self._position >= len(self._layer):
+            self._layer = next(self._layers, None)
+            self._position = 0
+
+            if self._layer is None:
+                pyglet.clock.unschedule(self._step)
+                self._on_done(self._generated)
+                return
+
+            self._generated.append(self._layer)
+
+        end = self._position + self._chunk_size
+        self._on_tiles(self._layer.transforms[self._position:end])
+        self._position = end
+
+
+def main(model_name: str = "poincare",
+         p: int = 4,
+         q: int = 6,
+         mode: str = "lazy",
+         layers: int = 6,
+         stats: typing.Optional[bool] = None,
+         use_cache: bool = True,
+         loop: str = "asyncio",
+         start_time: typing.Optional[float] = None):
+    """
+    :param mode: lazy grows a Tiling around the view, precomputed and instanced show a fixed number of layers
+    of a TriangleGroupTiling as scene geometry or as instanced polygons
+    :param stats: show the stats overlay, defaults to the POST_EUCLID_STATS environment variable
+    :param use_cache: load fixed tilings from the TilingCache, storing them once generated
+    :param loop: asyncio runs the window from an AsyncApp, pyglet from pyglet.app.run with the scene moved
+    directly by every input event
+    :param start_time: time.perf_counter() at process start, for the startup report
+    """
+    if start_time is None:
+        start_time = time.perf_counter()
+
+    if stats is None:
+        stats = bool(os.environ.get("POST_EUCLID_STATS"))
 
-    Tiling_3_7(scene).generate()
+    if mode == "instanced" and model_name != "poincare":
+        raise ValueError("Instanced rendering requires the poincare model")
+
+    def report(stage: str):
+        print(f"{stage:<14} {(time.perf_counter() - start_time) * 1000:8.1f} ms", file=sys.stderr)
+
+    report("imported")
+
+    model = create_model(model_name)
+    scene = Scene(model)
 
     window = pyglet.window.Window(
         caption="PostEuclid",
         width=800,
         height=800)
 
+    canvas = Canvas(window)
+
+    app = None
+    if loop == "asyncio":
+        from post_euclid.async_app import AsyncApp
+        app = AsyncApp(window, scene)
+
+    report("window")
+
+    renderer = None
+    instanced = None
+    update_tiling = None
+
+    if mode == "lazy":
+        from post_euclid.hyperbolic_2d.tiling import Tiling
+        from post_euclid.rendering.scene_renderer import SceneRenderer
+
+        # grown as the view moves, see update_tiling
+        tiling = Tiling(scene, p, q)
+
+        # keep the region around the view near the origin of the underlying coordinates
+        scene.rebase_distance = 2.0
+
+        renderer = SceneRenderer(scene, canvas)
+
+        def update_tiling():
+            # polygons smaller than a few pixels are not worth generating
+            tiling.update_view(canvas.to_disk_length(3.0))
+
+        if app is not None:
+            async def expand_tiling():
+                # in steps between frames, a newer view cancels the job and starts over
+                while tiling.update_view(canvas.to_disk_length(3.0), max_created=500)[0] >= 500:
+                    await asyncio.sleep(0)
+
+            app.add_view_listener(lambda: app.start_job("tiling", expand_tiling))
+    else:
+        from post_euclid.hyperbolic_2d.group_tiling import TriangleGroupTiling
+        from post_euclid.hyperbolic_2d.tiling_cache import TilingCache, TilingMesh
+
+        tiling = TriangleGroupTiling(p, q)
+        cache = TilingCache() if use_cache else None
+        mesh = cache.load(p, q, layers, model_name) if cache is not None else None
+
+        if mode == "instanced":
+            from post_euclid.rendering.instanced_renderer import InstancedTilingRenderer
+            instanced = InstancedTilingRenderer(scene, canvas, tiling, numpy.zeros((0, 2, 2)))
+        else:
+            from post_euclid.rendering.scene_renderer import SceneRenderer
+            renderer = SceneRenderer(scene, canvas)
+
+        if mesh is not None:
+            if instanced is not None:
+                instanced.set_transforms(mesh.transforms)
+            else:
+                mesh.add_to_scene(scene)
+
+            report("tiling loaded")
+        else:
+            def on_done(generated):
+                report("tiling done")
+
+                if cache is not None:
+                    cache.store(p, q, layers, model_name, TilingMesh.from_layers(tiling, generated))
+
+            if instanced is not None:
+                # instance data is uploaded from the main thread, so the tiles stream in from the clock
+                _TilingStream(tiling, layers, 2000, instanced.append_transforms, on_done)
+            else:
+                from post_euclid.hyperbolic_2d.tiling_worker import TilingWorker
+
+                # on_done runs on the worker thread, which is fine for reporting and storing the cache
+                TilingWorker(scene, tiling, layers, on_done=on_done).start()
+
     @window.event
     def on_text_motion(motion):
         step = 0.01
-        if motion == MOTION_LEFT:
-            scene.rotate(-step * 10)
+        angle = {MOTION_LEFT: -step * 10, MOTION_RIGHT: +step * 10}.get(motion, 0.0)
+        dy = {MOTION_UP: +step * 10, MOTION_DOWN: -step * 10}.get(motion, 0.0)
 
-        if motion == MOTION_RIGHT:
-            scene.rotate(+step * 10)
+        if app is not None:
+            # coalesced with other input until the next simulation tick
+            app.add_motion(0, dy, angle)
+            return
 
-        if motion == MOTION_UP:
-            scene.translate(0, +step * 10)
+        if angle != 0:
+            scene.rotate(angle)
 
-        if motion == MOTION_DOWN:
-            scene.translate(0, -step * 10)
+        if dy != 0:
+            scene.translate(0, dy)
 
-    canvas = Canvas(window)
+        if update_tiling is not None:
+            update_tiling()
+
+    overlay = None
+    if stats:
+        from post_euclid.profiling import FrameStats
+        from post_euclid.rendering.stats_overlay import StatsOverlay
+
+        frame_stats = FrameStats()
+        scene.stats = canvas.stats = frame_stats
+
+        for r in (renderer, instanced):
+            if r is not None:
+                r.stats = frame_stats
+
+        overlay = StatsOverlay(frame_stats, window)
+
+    background = pyglet.graphics.Batch()
+    unit_circle = None
+
+    @window.event
+    def on_resize(width, height):
+        nonlocal unit_circle
+
+        canvas.update(window)
+
+        if update_tiling is not None:
+            update_tiling()
+
+        # draw the unit circle
+        unit_circle = canvas.draw_circle(
+            euclidean_2d.entities.Circle(
+                center=euclidean_2d.entities.Point(0, 0),
+                radius=1
+            ),
+            color=(50, 50, 50),
+            batch=background)
+
+    on_resize(window.width, window.height)
+
+    first_frame = True
 
     @window.event
     def on_draw():
+        nonlocal first_frame
+
         window.clear()
-        canvas.update(window)
-        canvas.scale *= 1
+        canvas.begin_frame()
 
-        batch = pyglet.graphics.Batch()
+        if renderer is not None:
+            renderer.update()
 
-        #print(time.time() - timestamp)
+        background.draw()
 
-        # draw the unit circle
-        elements = [
-            canvas.draw_circle(
-                euclidean_2d.entities.Circle(
-                    center=euclidean_2d.entities.Point(0, 0),
-                    radius=1
-                ),
-                color=(50, 50, 50),
-            batch=batch)
-        ]
-        #print(len(renderable_entities))
-        timestamp = time.time()
-        for renderable in scene.get_renderable_entities():
-            elements.append(canvas.draw(renderable, batch=batch))
-
-        print(time.time() - timestamp)
-        batch.draw()
-
-    pyglet.app.run()
+        if renderer is not None:
+            renderer.draw()
+
+        if instanced is not None:
+            instanced.draw()
+
+        if overlay is not None:
+            overlay.draw()
+            scene.stats.end_frame()
+            overlay.update()
+
+        if first_frame:
+            first_frame = False
+            report("first frame")
+
+    if app is not None:
+        asyncio.run(app.run())
+    else:
+        pyglet.app.run()
 
 
 if __name__ == '__main__':
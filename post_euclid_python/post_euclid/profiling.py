@@ -0,0 +1,162 @@
+"""
+Opt-in per frame timings and counters for the rendering hot path.
+
+Scene, Canvas and SceneRenderer hold a stats object which defaults to NULL_STATS, whose hooks do nothing.
+Assign a FrameStats to each of them to start collecting:
+
+    stats = FrameStats()
+    scene.stats = canvas.stats = renderer.stats = stats
+
+    with stats.timer("stage"):
+        ...
+    stats.count("items", n)
+    stats.end_frame()
+"""
+from __future__ import annotations
+
+import collections
+import time
+import typing
+
+import numpy
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+class _StageTimer:
+    __slots__ = ("_stats", "_stage", "_start")
+
+    def __init__(self, stats: FrameStats, stage: str):
+        self._stats = stats
+        self._stage = stage
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stats.add_time(self._stage, time.perf_counter() - self._start)
+        return False
+
+
+class NullFrameStats:
+    """
+    Disabled stats, every hook is a no-op.
+    """
+
+    enabled = False
+
+    _timer = _NullTimer()
+
+    def timer(self, stage: str) -> typing.ContextManager:
+        return self._timer
+
+    def add_time(self, stage: str, seconds: float):
+        pass
+
+    def count(self, counter: str, n: int = 1):
+        pass
+
+    def end_frame(self):
+        pass
+
+
+NULL_STATS = NullFrameStats()
+
+
+class FrameStats(NullFrameStats):
+    """
+    Accumulates stage timings (seconds) and counters for the current frame, end_frame moves them into a
+    rolling history of the last history frames.
+    """
+
+    enabled = True
+
+    def __init__(self, history: int = 240):
+        self._current_times: typing.Dict[str, float] = {}
+        self._current_counts: typing.Dict[str, int] = {}
+        self._history: typing.Deque[typing.Tuple[typing.Dict[str, float], typing.Dict[str, int]]] = \
+            collections.deque(maxlen=history)
+
+    @property
+    def frame_count(self) -> int:
+        return len(self._history)
+
+    def timer(self, stage: str) -> typing.ContextManager:
+        """
+        :return: a context manager adding the time spent inside it to stage
+        """
+        return _StageTimer(self, stage)
+
+    def add_time(self, stage: str, seconds: float):
+        self._current_times[stage] = self._current_times.get(stage, 0.0) + seconds
+
+    def count(self, counter: str, n: int = 1):
+        self._current_counts[counter] = self._current_counts.get(counter, 0) + n
+
+    def end_frame(self):
+        self._history.append((self._current_times, self._current_counts))
+        self._current_times = {}
+        self._current_counts = {}
+
+    def stages(self) -> typing.List[str]:
+        return sorted(set(k for times, _ in self._history for k in times.keys()))
+
+    def counters(self) -> typing.List[str]:
+        return sorted(set(k for _, counts in self._history for k in counts.keys()))
+
+    def stage_times(self, stage: str) -> numpy.ndarray:
+        """
+        :return: the time spent in stage for every frame in the history, 0 for frames which did not enter it
+        """
+        return numpy.array([times.get(stage, 0.0) for times, _ in self._history])
+
+    def counter_values(self, counter: str) -> numpy.ndarray:
+        return numpy.array([counts.get(counter, 0) for _, counts in self._history], dtype=numpy.int64)
+
+    def histogram(self, stage: str, bins: int = 20) -> typing.Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        :return: counts and bin edges (seconds) of the stage times over the history, as numpy.histogram
+        """
+        return numpy.histogram(self.stage_times(stage), bins=bins)
+
+    def summary(self) -> typing.Dict[str, typing.Dict[str, float]]:
+        """
+        :return: mean, median, 95th percentile and maximum of every stage time and counter over the history
+        """
+        result = {}
+
+        for name, values in [(s, self.stage_times(s)) for s in self.stages()] + \
+                            [(c, self.counter_values(c)) for c in self.counters()]:
+            result[name] = {
+                "mean": float(numpy.mean(values)),
+                "p50": float(numpy.percentile(values, 50)),
+                "p95": float(numpy.percentile(values, 95)),
+                "max": float(numpy.max(values))
+            }
+
+        return result
+
+    def export(self, bins: int = 20) -> typing.Dict[str, typing.Any]:
+        """
+        :return: JSON serializable summary and histograms of the history
+        """
+        histograms = {}
+        for stage in self.stages():
+            counts, edges = self.histogram(stage, bins)
+            histograms[stage] = {"counts": counts.tolist(), "edges": edges.tolist()}
+
+        return {
+            "frames": self.frame_count,
+            "summary": self.summary(),
+            "histograms": histograms
+        }
@@ -1,34 +1,159 @@
 import math
 import typing
 
+import numpy
 import pyglet
+from pyglet.gl import GL_LINES, GL_POINTS
 
 from post_euclid import euclidean_2d
 from post_euclid.euclidean_2d import entities
+from post_euclid.profiling import NULL_STATS
+
+
+_line_vertex_source = """#version 330 core
+    in vec2 position;
+    in vec4 colors;
+    out vec4 vertex_colors;
+
+    uniform WindowBlock
+    {
+        mat4 projection;
+        mat4 view;
+    } window;
+
+    void main()
+    {
+        gl_Position = window.projection * window.view * vec4(position, 0.0, 1.0);
+        vertex_colors = colors;
+    }
+"""
+
+_line_fragment_source = """#version 330 core
+    in vec4 vertex_colors;
+    out vec4 final_colors;
+
+    void main()
+    {
+        final_colors = vertex_colors;
+    }
+"""
+
+
+def get_program(name: str, vertex_source: str, fragment_source: str) -> pyglet.graphics.shader.ShaderProgram:
+    """
+    Shader program compiled from the given sources, one per GL context.
+    :param name: identifies the program within the context
+    """
+    object_space = pyglet.gl.current_context.object_space
+    attribute = f"post_euclid_{name}_program"
+
+    try:
+        return getattr(object_space, attribute)
+    except AttributeError:
+        program = pyglet.graphics.shader.ShaderProgram(
+            pyglet.graphics.shader.Shader(vertex_source, 'vertex'),
+            pyglet.graphics.shader.Shader(fragment_source, 'fragment'))
+        setattr(object_space, attribute, program)
+        return program
+
+
+def get_line_program() -> pyglet.graphics.shader.ShaderProgram:
+    """
+    Shader program for flat colored 2d vertices in window coordinates, one per GL context.
+    """
+    return get_program("line", _line_vertex_source, _line_fragment_source)
+
+
+def line_vertex_pairs(points: numpy.ndarray) -> numpy.ndarray:
+    """
+    :param points: (N, K, ...) array of the K points along each of N polylines
+    :return: (N, K - 1, 2, ...) array of the end points of every line of the polylines
+    """
+    # GL_LINES takes each consecutive pair of vertices as a line
+    return numpy.stack((points[:, :-1], points[:, 1:]), axis=2)
 
 
 class Canvas:
 
-    def __init__(self, window):
+    def __init__(self, window, tolerance: float = 0.5):
         self.scale = 0.0
         self._origin = 0.0, 0.0
         self.update(window)
 
+        # maximum distance in pixels between a tessellated curve and the true curve
+        self.tolerance = tolerance
+
+        # number of line vertices emitted by the draw functions since begin_frame
+        self.vertex_count = 0
+
+        # see post_euclid.profiling
+        self.stats = NULL_STATS
+
         self._draw_function_map = {
             euclidean_2d.entities.Point: self.draw_point,
             euclidean_2d.entities.Circle: self.draw_circle,
             euclidean_2d.entities.CircleArc: self.draw_circle_arc,
             euclidean_2d.entities.LineSegment: self.draw_line_segment,
-            euclidean_2d.entities.Line: self.draw_line
+            euclidean_2d.entities.Line: self.draw_line,
+            euclidean_2d.entities.PointArray: self.draw_point_array,
+            euclidean_2d.entities.ArcArray: self.draw_arc_array
         }
 
+    def begin_frame(self):
+        """
+        Reset the per frame counters.
+        """
+        self.vertex_count = 0
+
+    def emit_vertices(self, count: int):
+        """
+        Record line vertices sent to the GPU this frame.
+        """
+        self.vertex_count += count
+        self.stats.count("vertices_emitted", count)
+
+    def arc_segment_count(self, radius: float, delta_angle: float) -> int:
+        """
+        Number of line segments needed to draw an arc without deviating more than tolerance from it.
+        :param radius: radius in pixels
+        :param delta_angle: angle spanned by the arc in radians
+        :return: 1 for arcs which are visually straight, e.g. tiny arcs and arcs of very large radius
+        """
+        delta_angle = abs(delta_angle)
+
+        if radius <= self.tolerance or radius * (1 - math.cos(delta_angle / 2)) <= self.tolerance:
+            return 1
+
+        # a chord spanning angle t deviates from the arc by radius * (1 - cos(t / 2))
+        max_segment_angle = 2 * math.acos(1 - self.tolerance / radius)
+
+        return math.ceil(delta_angle / max_segment_angle)
+
+    def arc_segment_counts(self, arcs: euclidean_2d.entities.ArcArray, max_segments: int) -> numpy.ndarray:
+        """
+        Vectorized arc_segment_count for every arc of arcs, limited to max_segments.
+        :return: (N,) int array, 1 for straight arcs
+        """
+        radius = numpy.where(arcs.straight, 0.0, arcs.radii * self.scale)
+        delta_angle = numpy.abs(arcs.angle_1 - arcs.angle_0)
+
+        # a chord spanning angle t deviates from the arc by radius * (1 - cos(t / 2))
+        curved = (radius > self.tolerance) & (radius * (1 - numpy.cos(delta_angle / 2)) > self.tolerance)
+        safe_radius = numpy.where(curved, radius, 1.0)
+        max_segment_angle = 2 * numpy.arccos(numpy.clip(1 - self.tolerance / safe_radius, -1.0, 1.0))
+
+        counts = numpy.ceil(delta_angle / numpy.where(curved, max_segment_angle, 1.0))
+
+        return numpy.where(curved, numpy.clip(counts, 1, max_segments), 1).astype(numpy.intp)
+
     def draw(self, euclidean_entity: euclidean_2d.entities.Euclidean2D, *args, **kwargs):
-        if euclidean_entity.__class__ in self._draw_function_map:
-            return self._draw_function_map[euclidean_entity.__class__](euclidean_entity, *args, **kwargs)
-        else:
-            for k, v in self._draw_function_map.items():
-                if isinstance(euclidean_entity, k):
-                    return v(euclidean_entity, *args, **kwargs)
+        with self.stats.timer("shapes"):
+            if euclidean_entity.__class__ in self._draw_function_map:
+                return self._draw_function_map[euclidean_entity.__class__](euclidean_entity, *args, **kwargs)
+            else:
+                for k, v in self._draw_function_map.items():
+                    if isinstance(euclidean_entity, k):
+                        return v(euclidean_entity, *args, **kwargs)
 
         raise ValueError("No draw function for entity")
 
@@ -72,11 +197,17 @@ class Canvas:
         a0 = circle_arc.angle_0
         delta_angle = circle_arc.angle_1 - circle_arc.angle_0
         radius = circle_arc.circle.radius * self.scale
-        arc_length = delta_angle * radius
 
-        segments = 8
-        segments = int(max(float(segments), 4.0 * delta_angle / math.pi))
-        segments = int(max(3.0, min(float(segments), arc_length / 5)))
+        segments = self.arc_segment_count(radius, delta_angle)
+        self.emit_vertices(segments * 2)
+
+        if segments == 1:
+            cx, cy = self._to_render_coords(*circle_arc.circle.center)
+            a1 = a0 + delta_angle
+            return pyglet.shapes.Line(cx + radius * math.cos(a0), cy + radius * math.sin(a0),
+                                      cx + radius * math.cos(a1), cy + radius * math.sin(a1),
+                                      *args,
+                                      **kwargs)
 
         return pyglet.shapes.Arc(*self._to_render_coords(*circle_arc.circle.center),
                           radius=radius,
@@ -88,12 +219,48 @@ class Canvas:
                           segments=segments)
 
     def draw_line_segment(self, line_segment: euclidean_2d.entities.LineSegment, *args, **kwargs):
+        self.emit_vertices(2)
         return pyglet.shapes.Line(
             *self._to_render_coords(*line_segment.p0),
             *self._to_render_coords(*line_segment.p1),
             *args,
             **kwargs)
 
+    def draw_arc_array(self,
+                       arcs: euclidean_2d.entities.ArcArray,
+                       color: typing.Tuple[int, int, int, int] = (255, 255, 255, 255),
+                       batch: typing.Optional[pyglet.graphics.Batch] = None,
+                       segments: int = 16):
+        """
+        Draw all arcs as a single vertex list of lines, rather than a shape per arc.
+        :param segments: the maximum number of line segments per arc, see arc_segment_count
+        """
+        counts = self.arc_segment_counts(arcs, segments)
+        points = self.to_render_coords_array(arcs.tessellate(segments, counts))
+
+        # the padding past each arc's count is dropped
+        used = numpy.arange(segments) < counts[:, None]
+        lines = line_vertex_pairs(points)[used].reshape(-1)
+        self.emit_vertices(len(lines) // 2)
+
+        return get_line_program().vertex_list(
+            len(lines) // 2, GL_LINES,
+            batch=batch,
+            position=('f', lines),
+            colors=('Bn', numpy.tile(numpy.array(color, dtype=numpy.uint8), len(lines) // 2)))
+
+    def draw_point_array(self,
+                         points: euclidean_2d.entities.PointArray,
+                         color: typing.Tuple[int, int, int, int] = (50, 50, 250, 255),
+                         batch: typing.Optional[pyglet.graphics.Batch] = None):
+        render_points = self.to_render_coords_array(points.points).reshape(-1)
+
+        return get_line_program().vertex_list(
+            len(points), GL_POINTS,
+            batch=batch,
+            position=('f', render_points),
+            colors=('Bn', numpy.tile(numpy.array(color, dtype=numpy.uint8), len(points))))
+
     def update(self, window):
         self.scale = min(window.width, window.height) * 0.5 - 5
         self._origin = window.width / 2, window.height / 2
@@ -105,6 +272,26 @@ class Canvas:
                               *args,
                               **kwargs)
 
+    @property
+    def origin(self) -> typing.Tuple[float, float]:
+        return self._origin
+
+    def to_disk_length(self, pixels: float) -> float:
+        """
+        :return: the euclidean length on the disk covering the given number of pixels
+        """
+        return pixels / self.scale
+
     def _to_render_coords(self, x: float, y: float):
         return (-x * self.scale + self._origin[0],
                 -y * self.scale + self._origin[1])
+
+    def to_render_coords_array(self, points: numpy.ndarray) -> numpy.ndarray:
+        """
+        Vectorized _to_render_coords for a complex array of disk coordinates.
+        :return: float array with an additional trailing axis of size 2 holding x, y
+        """
+        result = numpy.empty(points.shape + (2,), dtype=numpy.float32)
+        result[..., 0] = -points.real * self.scale + self._origin[0]
+        result[..., 1] = -points.imag * self.scale + self._origin[1]
+        return result
@@ -0,0 +1,227 @@
+"""
+Instanced rendering of the tiles of a TriangleGroupTiling.
+"""
+import typing
+
+import numpy
+import pyglet
+from pyglet.gl import GL_ARRAY_BUFFER, GL_FALSE, GL_FLOAT, GL_LINES, GL_STATIC_DRAW, glEnableVertexAttribArray, \
+    glVertexAttribPointer, glVertexAttribDivisor, glDrawArraysInstanced
+from pyglet.graphics.vertexarray import VertexArray
+from pyglet.graphics.vertexbuffer import BufferObject
+
+from post_euclid.hyperbolic_2d.group_tiling import TriangleGroupTiling
+from post_euclid.hyperbolic_2d.poincare.poincare import PoincareModelLineSegment, PoincareModelTransformTool
+from post_euclid.hyperbolic_2d.scene import Scene
+from post_euclid.profiling import NULL_STATS
+from post_euclid.rendering.canvas import Canvas, get_program, line_vertex_pairs
+
+
+_instanced_vertex_source = """#version 330 core
+    // edge points of the fundamental polygon on the disk
+    layout(location = 0) in vec2 position;
+
+    // per instance mobius transform of the tile, as (re a, im a, re b, im b) and (re c, im c, re d, im d)
+    layout(location = 1) in vec4 tile_ab;
+    layout(location = 2) in vec4 tile_cd;
+
+    uniform vec4 scene_ab;
+    uniform vec4 scene_cd;
+
+    uniform vec2 canvas_origin;
+    uniform float canvas_scale;
+
+    uniform WindowBlock
+    {
+        mat4 projection;
+        mat4 view;
+    } window;
+
+    vec2 complex_mult(vec2 a, vec2 b) {
+        return vec2(a.x * b.x - a.y * b.y, a.x * b.y + a.y * b.x);
+    }
+
+    vec2 complex_div(vec2 a, vec2 b) {
+        return vec2(a.x * b.x + a.y * b.y, a.y * b.x - a.x * b.y) / dot(b, b);
+    }
+
+    vec2 apply_mobius_trsf(vec4 ab, vec4 cd, vec2 z) {
+        return complex_div(complex_mult(ab.xy, z) + ab.zw, complex_mult(cd.xy, z) + cd.zw);
+    }
+
+    void main()
+    {
+        vec2 z = apply_mobius_trsf(scene_ab, scene_cd, apply_mobius_trsf(tile_ab, tile_cd, position));
+
+        // see Canvas._to_render_coords
+        gl_Position = window.projection * window.view * vec4(-z * canvas_scale + canvas_origin, 0.0, 1.0);
+    }
+"""
+
+_instanced_fragment_source = """#version 330 core
+    uniform vec4 color;
+    out vec4 final_colors;
+
+    void main()
+    {
+        final_colors = color;
+    }
+"""
+
+
+def get_instanced_tiling_program() -> pyglet.graphics.shader.ShaderProgram:
+    """
+    Shader program mapping the fundamental polygon through per instance and scene mobius transforms,
+    one per GL context.
+    """
+    return get_program("instanced_tiling", _instanced_vertex_source, _instanced_fragment_source)
+
+
+def _as_vec4_pair(transform) -> typing.Tuple[typing.Tuple[float, ...], typing.Tuple[float, ...]]:
+    a, b, c, d = (complex(v) for v in transform)
+    return (a.real, a.imag, b.real, b.imag), (c.real, c.imag, d.real, d.imag)
+
+
+class InstancedTilingRenderer:
+    """
+    Draws every tile as the fundamental polygon's edges mapped through the tile's mobius transform on the GPU.
+
+    The edge geometry is uploaded once and each tile is one instance of 8 floats. The scene transform is a
+    uniform, so moving the view costs the same regardless of the tile count. Edges shared by two tiles are
+    drawn by both.
+
+    Only scenes using the poincare model are supported, as the scene transform is passed to the shader as a
+    mobius transform. The tile transforms follow Scene.rebase. The GPU evaluates the transforms in single
+    precision, which limits how deep the tiling can usefully be.
+    """
+
+    def __init__(self,
+                 scene: Scene,
+                 canvas: Canvas,
+                 tiling: TriangleGroupTiling,
+                 transforms: numpy.ndarray,
+                 segments_per_edge: int = 16,
+                 color: typing.Tuple[int, int, int, int] = (255, 255, 255, 255)):
+        """
+        :param transforms: (N, 2, 2) tile transforms, e.g. concatenated from TriangleGroupTiling.enumerate
+        """
+        if not isinstance(scene.model.get_transform_tool(), PoincareModelTransformTool):
+            raise ValueError("Instanced rendering requires a scene using the poincare model")
+
+        self._scene = scene
+        self._canvas = canvas
+        self._color = tuple(c / 255 for c in color)
+        self._program = get_instanced_tiling_program()
+
+        # see post_euclid.profiling
+        self.stats = NULL_STATS
+
+        vertices = tiling.fundamental_polygon
+        p0_indices = numpy.arange(0, tiling.p)
+        p1_indices = (p0_indices + 1) % tiling.p
+
+        points = PoincareModelLineSegment.get_euclidean_representation_batch(
+            vertices, p0_indices, p1_indices).tessellate(segments_per_edge)
+
+        lines = line_vertex_pairs(points).reshape(-1)
+        geometry = numpy.stack((lines.real, lines.imag), axis=1).astype(numpy.float32)
+        self._vertex_count = len(geometry)
+
+        self._vao = VertexArray()
+        self._geometry = BufferObject(geometry.nbytes, GL_STATIC_DRAW)
+        self._instances: typing.Optional[BufferObject] = None
+        self._instance_count = 0
+
+        with self._vao:
+            self._geometry.set_data(geometry.ctypes.data)
+            glEnableVertexAttribArray(0)
+            glVertexAttribPointer(0, 2, GL_FLOAT, GL_FALSE, 0, 0)
+
+        # tile transforms in the first instance_count entries, the buffers grow by doubling like SceneRenderer's
+        self._transforms = numpy.zeros((0, 2, 2), dtype=numpy.complex128)
+        self.set_transforms(transforms)
+
+        scene.add_rebase_listener(self._on_rebase)
+
+    @property
+    def instance_count(self) -> int:
+        return self._instance_count
+
+    @staticmethod
+    def _instance_data(transforms: numpy.ndarray) -> numpy.ndarray:
+        data = numpy.empty((len(transforms), 8), dtype=numpy.float32)
+        data[:, 0::2] = transforms.reshape(-1, 4).real
+        data[:, 1::2] = transforms.reshape(-1, 4).imag
+        return data
+
+    def _reserve(self, count: int):
+        if count <= len(self._transforms) and self._instances is not None:
+            return
+
+        capacity = max(count, 2 * len(self._transforms), 1)
+
+        transforms = numpy.zeros((capacity, 2, 2), dtype=numpy.complex128)
+        transforms[:self._instance_count] = self._transforms[:self._instance_count]
+        self._transforms = transforms
+
+        if self._instances is not None:
+            self._instances.delete()
+
+        self._instances = BufferObject(capacity * 32, GL_STATIC_DRAW)
+
+        with self._vao:
+            self._instances.bind(GL_ARRAY_BUFFER)
+            for location, offset in ((1, 0), (2, 16)):
+                glEnableVertexAttribArray(location)
+                glVertexAttribPointer(location, 4, GL_FLOAT, GL_FALSE, 32, offset)
+                glVertexAttribDivisor(location, 1)
+
+        if self._instance_count > 0:
+            data = self._instance_data(self._transforms[:self._instance_count])
+            self._instances.set_data_region(data.ctypes.data, 0, data.nbytes)
+
+    def set_transforms(self, transforms: numpy.ndarray):
+        """
+        Replace the tiles drawn, uploading their transforms.
+        """
+        self._instance_count = 0
+        self.append_transforms(transforms)
+
+    def append_transforms(self, transforms: numpy.ndarray):
+        """
+        Add tiles to those drawn, uploading only their transforms, e.g. as a tiling streams in.
+        """
+        transforms = numpy.asarray(transforms, dtype=numpy.complex128).reshape(-1, 2, 2)
+        start = self._instance_count
+
+        self._reserve(start + len(transforms))
+        self._transforms[start:start + len(transforms)] = transforms
+
+        if len(transforms) > 0:
+            data = self._instance_data(transforms)
+            self._instances.set_data_region(data.ctypes.data, start * 32, data.nbytes)
+
+        self._instance_count = start + len(transforms)
+
+    def _on_rebase(self, transform):
+        # the scene transform was folded into the underlying points, fold it into the tiles likewise
+        a, b, c, d = (complex(v) for v in transform)
+        self.set_transforms(numpy.array([[a, b], [c, d]]) @ self._transforms[:self._instance_count])
+
+    def draw(self):
+        with self.stats.timer("draw"):
+            scene_ab, scene_cd = _as_vec4_pair(self._scene.transform)
+
+            self._program.use()
+            self._program['scene_ab'] = scene_ab
+            self._program['scene_cd'] = scene_cd
+            self._program['canvas_origin'] = self._canvas.origin
+            self._program['canvas_scale'] = self._canvas.scale
+            self._program['color'] = self._color
+
+            with self._vao:
+                glDrawArraysInstanced(GL_LINES, 0, self._vertex_count, self._instance_count)
+
+            self._program.stop()
+
+        self._canvas.emit_vertices(self._vertex_count * self._instance_count)
@@ -0,0 +1,126 @@
+"""
+Retained mode rendering of the line segments in a scene.
+"""
+import typing
+
+import numpy
+import pyglet
+from pyglet.gl import GL_LINES
+
+from post_euclid.hyperbolic_2d.scene import Scene
+from post_euclid.profiling import NULL_STATS
+from post_euclid.rendering.canvas import Canvas, get_line_program, line_vertex_pairs
+
+
+class SceneRenderer:
+    """
+    Draws every line segment of the scene from a single vertex list, which is only reallocated when the scene
+    outgrows it. Vertex positions are rewritten in place only when the scene (or the canvas) changes.
+
+    Segments spanning less than min_pixel_size are culled before their geometry is evaluated, visible segments
+    fill the start of the vertex list and the remainder is collapsed into degenerate lines. Each segment has
+    segments_per_edge lines of the vertex list, of which it uses as many as the canvas tolerance requires (see
+    Canvas.arc_segment_count), the others repeat its end point.
+    """
+
+    def __init__(self,
+                 scene: Scene,
+                 canvas: Canvas,
+                 segments_per_edge: int = 16,
+                 color: typing.Tuple[int, int, int, int] = (255, 255, 255, 255),
+                 batch: typing.Optional[pyglet.graphics.Batch] = None,
+                 min_pixel_size: float = 1.0):
+        self._scene = scene
+        self._canvas = canvas
+        self._segments = segments_per_edge
+        self._color = color
+        self._min_pixel_size = min_pixel_size
+        self._visible_count = 0
+        self._line_count = 0
+
+        self._batch = batch if batch is not None else pyglet.graphics.Batch()
+        self._program = get_line_program()
+
+        self._vertex_list = None
+        self._capacity = 0
+
+        # everything the vertex positions depend on, as of the last upload
+        self._uploaded_state = None
+
+        # see post_euclid.profiling
+        self.stats = NULL_STATS
+
+    @property
+    def batch(self) -> pyglet.graphics.Batch:
+        return self._batch
+
+    @property
+    def visible_count(self) -> int:
+        """
+        :return: the number of segments which survived culling in the last upload
+        """
+        return self._visible_count
+
+    def _allocate(self, segment_count: int):
+        if self._vertex_list is not None:
+            self._vertex_list.delete()
+
+        # leave room for the scene to grow, e.g. with a view driven tiling
+        self._capacity = max(segment_count, 2 * self._capacity)
+        self._vertex_list = self._program.vertex_list(
+            self._capacity * self._segments * 2, GL_LINES,
+            batch=self._batch,
+            position='f',
+            colors='Bn')
+
+        numpy.ctypeslib.as_array(self._vertex_list.colors).reshape(-1, 4)[:] = self._color
+
+    def _get_state(self):
+        return (
+            self._scene.transform_generation,
+            self._scene.revision,
+            self._canvas.scale,
+            self._canvas.origin,
+            self._canvas.tolerance,
+            self._min_pixel_size
+        )
+
+    def update(self) -> bool:
+        """
+        Bring the vertex list in line with the scene.
+        :return: True if vertex data was uploaded, False if nothing changed since the previous update
+        """
+        # a consistent snapshot, the scene may be growing from another thread
+        with self._scene.lock:
+            state = self._get_state()
+            if state == self._uploaded_state:
+                return False
+
+            segment_count = self._scene.segment_count
+            arcs = self._scene.get_renderable_arcs(self._canvas.to_disk_length(self._min_pixel_size))
+
+        if self._vertex_list is None or segment_count > self._capacity:
+            self._allocate(segment_count)
+
+        if self._capacity > 0:
+            with self.stats.timer("upload"):
+                counts = self._canvas.arc_segment_counts(arcs, self._segments)
+                render_points = self._canvas.to_render_coords_array(arcs.tessellate(self._segments, counts))
+
+                lines = line_vertex_pairs(render_points).reshape(-1)
+
+                positions = numpy.ctypeslib.as_array(self._vertex_list.position)
+                positions[:len(lines)] = lines
+                positions[len(lines):] = 0
+
+            self._visible_count = len(arcs)
+            self._line_count = int(counts.sum())
+
+        self._uploaded_state = state
+        return True
+
+    def draw(self):
+        self._canvas.emit_vertices(self._line_count * 2)
+
+        with self.stats.timer("draw"):
+            self._batch.draw()
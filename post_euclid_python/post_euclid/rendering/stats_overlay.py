@@ -0,0 +1,55 @@
+"""
+On screen display of FrameStats.
+"""
+import pyglet
+
+from post_euclid.profiling import FrameStats
+
+
+class StatsOverlay:
+    """
+    Multiline label in the top left corner of the window listing the mean and 95th percentile of every stage
+    time and counter. The text is refreshed every update_interval frames, formatting it each frame would show
+    up in the timings being displayed.
+    """
+
+    def __init__(self, stats: FrameStats, window: pyglet.window.Window, update_interval: int = 30):
+        self._stats = stats
+        self._window = window
+        self._update_interval = update_interval
+        self._frames = 0
+
+        self._label = pyglet.text.Label(
+            "",
+            font_name="monospace",
+            font_size=10,
+            x=10,
+            y=window.height - 10,
+            width=window.width - 20,
+            anchor_y="top",
+            multiline=True,
+            color=(200, 200, 80, 255))
+
+    def _format(self) -> str:
+        lines = []
+        stages = self._stats.stages()
+
+        for name, values in self._stats.summary().items():
+            if name in stages:
+                lines.append(f"{name:<18} {values['mean'] * 1000:8.3f} ms  p95 {values['p95'] * 1000:8.3f} ms")
+            else:
+                lines.append(f"{name:<18} {values['mean']:10.0f}     p95 {values['p95']:10.0f}")
+
+        return "\n".join(lines)
+
+    def update(self):
+        self._frames += 1
+        if self._frames % self._update_interval != 0:
+            return
+
+        self._label.y = self._window.height - 10
+        self._label.width = self._window.width - 20
+        self._label.text = self._format()
+
+    def draw(self):
+        self._label.draw()
@@ -0,0 +1,12 @@
+import os
+import sys
+
+import pyglet
+
+# the tests import post_euclid from this tree, wherever pytest is run from
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# the rendering modules need a GL context on import, without a display use an offscreen one
+if not os.environ.get("DISPLAY"):
+    pyglet.options["headless"] = True
+    pyglet.options["shadow_window"] = False
@@ -0,0 +1,47 @@
+import math
+import types
+
+import numpy
+
+from post_euclid.euclidean_2d.entities import ArcArray
+from post_euclid.rendering.canvas import Canvas
+
+
+def _arcs(radii: numpy.ndarray, delta_angles: numpy.ndarray, straight: numpy.ndarray) -> ArcArray:
+    zeros = numpy.zeros(len(radii), dtype=numpy.complex128)
+    return ArcArray(p0=zeros, p1=zeros, centers=zeros, radii=radii, angle_0=numpy.full(len(radii), 0.5),
+                    angle_1=0.5 + delta_angles, straight=straight)
+
+
+def test_arc_segment_counts():
+    # only the window size is read by the canvas
+    canvas = Canvas(types.SimpleNamespace(width=800, height=800))
+    max_segments = 16
+
+    rng = numpy.random.default_rng(0)
+    count = 500
+    radii = numpy.exp(rng.uniform(math.log(1e-4), math.log(1e3), count))
+    delta_angles = rng.uniform(-math.pi, math.pi, count)
+    straight = rng.uniform(0, 1, count) < 0.1
+
+    counts = canvas.arc_segment_counts(_arcs(radii, delta_angles, straight), max_segments)
+
+    assert counts.min() >= 1 and counts.max() <= max_segments
+    assert (counts[straight] == 1).all()
+
+    for radius, delta_angle, is_straight, segments in zip(radii, delta_angles, straight, counts.tolist()):
+        if not is_straight:
+            assert segments == min(canvas.arc_segment_count(radius * canvas.scale, delta_angle), max_segments)
+
+
+def test_arc_segment_counts_decrease_with_projected_size():
+    canvas = Canvas(types.SimpleNamespace(width=800, height=800))
+
+    # the same arcs scaled down, as polygons receding towards the boundary
+    scales = numpy.geomspace(1.0, 1e-4, 50)
+    arcs = _arcs(2.0 * scales, numpy.full(len(scales), 1.0), numpy.zeros(len(scales), dtype=bool))
+
+    counts = canvas.arc_segment_counts(arcs, 64)
+
+    assert counts[0] > 1 and counts[-1] == 1
+    assert (numpy.diff(counts) <= 0).all()
@@ -0,0 +1,65 @@
+import collections
+
+import numpy
+import pytest
+
+from post_euclid.hyperbolic_2d.group_tiling import TriangleGroupTiling
+from post_euclid.hyperbolic_2d.poincare.poincare import PoincareHyperbolicModel
+from post_euclid.hyperbolic_2d.scene import Scene
+from post_euclid.hyperbolic_2d.tiling import Tiling
+from post_euclid.hyperbolic_2d.vertex_index import merge_points
+
+
+def _vertex_layer_counts(p: int, q: int, layers: int):
+    """
+    Tile counts per vertex layer of the breadth first Tiling, which grows by edge layers. A tile shares a
+    vertex with one at most q // 2 edge layers away, so this many edge layers cover every vertex layer.
+    """
+    scene = Scene(PoincareHyperbolicModel())
+    tiling = Tiling(scene, p, q)
+    tiling.generate(layers=(layers - 1) * (q // 2) + 1)
+
+    polygons_by_vertex = collections.defaultdict(list)
+    for polygon in tiling.polygons:
+        for vertex in polygon.vertices:
+            polygons_by_vertex[vertex].append(polygon)
+
+    layer = [tiling.polygons[0]]
+    seen = set(layer)
+    counts = [1]
+
+    for _ in range(1, layers):
+        next_layer = []
+
+        for polygon in layer:
+            for vertex in polygon.vertices:
+                for other in polygons_by_vertex[vertex]:
+                    if other not in seen:
+                        seen.add(other)
+                        next_layer.append(other)
+
+        layer = next_layer
+        counts.append(len(layer))
+
+    return counts
+
+
+@pytest.mark.parametrize("p, q, layers", [(3, 7, 5), (4, 5, 4), (7, 3, 4), (5, 4, 4), (4, 6, 4), (6, 4, 3)])
+def test_enumerate(p, q, layers):
+    tiling = TriangleGroupTiling(p, q)
+    enumerated = tiling.enumerate(layers)
+
+    # no tile is produced twice
+    centers = numpy.concatenate([tiling.tile_centers(layer.transforms) for layer in enumerated])
+    merged_centers, _ = merge_points(centers)
+    assert len(merged_centers) == len(centers)
+
+    # every vertex of the inner layers is surrounded by q tiles
+    vertices = numpy.concatenate([tiling.tile_vertices(layer.transforms) for layer in enumerated])
+    _, indices = merge_points(vertices)
+    valence = numpy.bincount(indices)
+
+    inner = sum(len(layer) for layer in enumerated[:-1]) * p
+    assert (valence[indices[:inner]] == q).all()
+
+    assert [len(layer) for layer in enumerated] == _vertex_layer_counts(p, q, layers)
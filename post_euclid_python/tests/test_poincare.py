@@ -0,0 +1,90 @@
+import math
+
+import numpy
+
+from post_euclid.euclidean_2d import entities
+from post_euclid.hyperbolic_2d.poincare.poincare import PoincareHyperbolicModel, PoincareModelTransformTool, \
+    PoincareModelLineSegment, PoincareModelPoint
+from post_euclid.hyperbolic_2d.scene import Scene
+
+
+def test_normalize_preserves_mobius_transform():
+    tool = PoincareModelTransformTool()
+    points = 0.9 * numpy.exp(1j * numpy.linspace(0, 2 * math.pi, 7))
+
+    for trsf in (tool.create_rotation_like(2.5),
+                 tool.create_translation_like(0.3, -0.4),
+                 tool.gyro_mult(tool.create_rotation_like(-2.0), tool.create_translation_like(0.5, 0.2)),
+                 tuple(-3j * v for v in tool.create_translation_like(0.1, 0.2))):
+        normalized = tool.normalize(trsf)
+
+        assert numpy.allclose(tool.apply_to_array(normalized, points), tool.apply_to_array(trsf, points))
+        assert math.isclose(abs(normalized[0]) ** 2 - abs(normalized[1]) ** 2, 1)
+
+
+def test_translate_far_from_origin():
+    scene = Scene(PoincareHyperbolicModel())
+
+    step = 0.1
+    steps = 1000
+
+    # without rebasing the scene transform itself has to represent the distance travelled
+    for _ in range(0, steps):
+        scene.translate(0, step)
+
+    b = scene.transform[1]
+    distance = 2 * math.asinh(abs(b))
+
+    assert math.isclose(distance, steps * 2 * math.atanh(step), rel_tol=1e-9)
+    assert math.isclose(b.real, 0, abs_tol=1e-9 * abs(b))
+
+
+def _scalar_representation(p0: complex, p1: complex):
+    return PoincareModelLineSegment(PoincareModelPoint(p0.real, p0.imag),
+                                    PoincareModelPoint(p1.real, p1.imag)).get_euclidean_representation()
+
+
+def test_euclidean_representation_batch_matches_scalar():
+    rng = numpy.random.default_rng(0)
+    count = 200
+
+    def random_points(n):
+        return numpy.sqrt(rng.uniform(0, 0.98, n)) * numpy.exp(1j * rng.uniform(0, 2 * math.pi, n))
+
+    p0 = random_points(count)
+    p1 = random_points(count)
+
+    # nearly collinear with the origin, through the origin, and with coincident end points
+    p0 = numpy.concatenate((p0, [0.3 + 0.2j, 0j, 0.5j, 0.1 + 0.1j, -0.4 + 0.3j]))
+    p1 = numpy.concatenate((p1, [0.6 + 0.4j + 1e-17j, 0.2 - 0.7j, 0j, 0.1 + 0.1j, -0.4 + 0.3j]))
+
+    points = numpy.concatenate((p0, p1))
+    arcs = PoincareModelLineSegment.get_euclidean_representation_batch(
+        points, numpy.arange(len(p0)), numpy.arange(len(p0), len(points)))
+
+    assert numpy.isfinite(arcs.radii).all()
+
+    for z0, z1, arc in zip(p0.tolist(), p1.tolist(), arcs):
+        expected = _scalar_representation(z0, z1)
+        assert type(arc) is type(expected)
+
+        if isinstance(expected, entities.CircleArc):
+            assert math.isclose(arc.circle.radius, expected.circle.radius, rel_tol=1e-9)
+            assert math.isclose(arc.circle.center.x, expected.circle.center.x, rel_tol=1e-9)
+            assert math.isclose(arc.circle.center.y, expected.circle.center.y, rel_tol=1e-9)
+            assert math.isclose(arc.angle_0, expected.angle_0, abs_tol=1e-9)
+            assert math.isclose(arc.angle_1, expected.angle_1, abs_tol=1e-9)
+        else:
+            assert complex(*arc.p0) == z0 and complex(*arc.p1) == z1
+
+
+def test_euclidean_representation_batch_tiny_segments_near_boundary():
+    # rounding can place the circle center of these inside the disk, they are drawn straight instead
+    z = 0.999999 * numpy.exp(1j * numpy.linspace(0, 2 * math.pi, 1000))
+    points = numpy.concatenate((z, z * numpy.exp(1e-9j)))
+
+    arcs = PoincareModelLineSegment.get_euclidean_representation_batch(
+        points, numpy.arange(len(z)), numpy.arange(len(z), len(points)))
+
+    assert numpy.isfinite(arcs.radii).all()
+    assert numpy.isfinite(arcs.centers).all()
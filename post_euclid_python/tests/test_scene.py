@@ -0,0 +1,71 @@
+import threading
+
+import pytest
+
+from post_euclid.hyperbolic_2d.poincare.poincare import PoincareHyperbolicModel
+from post_euclid.hyperbolic_2d.scene import Scene, SceneLineSegment
+
+
+def test_transform_stack_per_thread():
+    scene = Scene(PoincareHyperbolicModel())
+    scene.push_transform()
+
+    errors = []
+
+    def pop_in_other_thread():
+        try:
+            scene.pop_transform()
+        except RuntimeError as e:
+            errors.append(e)
+
+    # the push of this thread is not visible to the other thread
+    thread = threading.Thread(target=pop_in_other_thread)
+    thread.start()
+    thread.join()
+
+    assert len(errors) == 1
+
+    scene.translate(0.1, 0.2)
+    scene.pop_transform()
+
+    assert scene.transform == scene.model.get_transform_tool().create_identity()
+
+
+def test_rebase_keeps_saved_transforms():
+    scene = Scene(PoincareHyperbolicModel())
+    point = scene.create_underlying_point_reference(0j)
+
+    with scene:
+        scene.translate(0.3, 0.1)
+        scene.rebase()
+
+    assert abs(complex(*scene.point_value(point).xy)) < 1e-12
+
+
+def test_point_value_uses_transformed_points():
+    scene = Scene(PoincareHyperbolicModel())
+    handles = scene.create_underlying_point_references([0j, 0.5 + 0j, 0.25j])
+
+    scene.translate(0.1, 0.2)
+    values = [complex(*scene.point_value(int(handle)).xy) for handle in handles]
+    transformed = scene.get_transformed_points()
+
+    # one evaluation of every point per transform, reused by later calls
+    scene.point_value(int(handles[0]))
+    assert scene.get_transformed_points() is transformed
+    assert values == transformed.tolist()
+
+
+def test_scene_item_with_named_points():
+    scene = Scene(PoincareHyperbolicModel())
+    scene.translate(0.1, 0.0)
+
+    p0 = scene.create_named_point_reference("p0")
+    p1 = scene.create_named_point_reference()
+    scene.add_scene_item(SceneLineSegment(p0, p1))
+
+    assert scene.segment_count == 1
+    assert len(list(scene.get_renderable_entities())) == 1
+
+    with pytest.raises(ValueError, match="missing"):
+        scene.add_scene_item(SceneLineSegment(p0, "missing"))
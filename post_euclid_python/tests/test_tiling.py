@@ -0,0 +1,55 @@
+import numpy
+import pytest
+
+from post_euclid.hyperbolic_2d.poincare.poincare import PoincareHyperbolicModel
+from post_euclid.hyperbolic_2d.scene import Scene
+from post_euclid.hyperbolic_2d.tiling import Tiling
+from post_euclid.hyperbolic_2d.weierstrass.weierstrass import WeierstrassHyperbolicModel
+
+
+@pytest.mark.parametrize("model", [PoincareHyperbolicModel, WeierstrassHyperbolicModel])
+def test_update_view_while_navigating(model):
+    scene = Scene(model())
+    scene.rebase_distance = 2.0
+
+    tiling = Tiling(scene, 4, 6)
+    min_size = 3.0 / 400
+
+    # vertices of polygons grown over many rebases have to keep matching those of their neighbours
+    for i in range(0, 300):
+        scene.translate(0.1 if (i // 20) % 2 else -0.1, 0.1)
+        scene.rotate(0.02)
+        tiling.update_view(min_size)
+
+    handles = sorted({vertex for polygon in tiling.polygons for vertex in polygon.vertices})
+    values = scene.underlying_point_values(handles)
+
+    distances = numpy.abs(values[:, None] - values[None, :])
+    numpy.fill_diagonal(distances, 1.0)
+
+    assert distances.min() > 1e-4
+
+    for polygon in tiling.polygons:
+        for neighbour in polygon.neighbours:
+            if neighbour is not None:
+                assert polygon in neighbour.neighbours
+
+
+@pytest.mark.parametrize("max_polygons", [50, 800, 801])
+def test_update_view_max_polygons(max_polygons):
+    scene = Scene(PoincareHyperbolicModel())
+    tiling = Tiling(scene, 7, 3)
+
+    tiling.update_view(1.0 / 800, max_polygons=max_polygons)
+
+    assert len(tiling.polygons) == max_polygons
+
+
+def test_update_view_max_created():
+    scene = Scene(PoincareHyperbolicModel())
+    tiling = Tiling(scene, 4, 6)
+    tiling.update_view(1.0)
+
+    created, _ = tiling.update_view(1.0 / 800, max_created=101)
+
+    assert created == 101
@@ -0,0 +1,55 @@
+import os
+
+import numpy
+
+from post_euclid.hyperbolic_2d.tiling_cache import TilingCache, TilingMesh
+
+
+def test_store_and_load(tmp_path, monkeypatch):
+    monkeypatch.setenv("POST_EUCLID_CACHE", str(tmp_path))
+    cache = TilingCache()
+    assert cache.directory == str(tmp_path)
+
+    assert cache.load(4, 6, 3, "poincare") is None
+
+    mesh = TilingMesh.build(4, 6, 3)
+    cache.store(4, 6, 3, "poincare", mesh)
+    loaded = cache.load(4, 6, 3, "poincare")
+
+    for name in ("vertices", "edges", "polygons", "adjacency", "transforms"):
+        array = getattr(loaded, name)
+
+        # read through a read only memory map
+        assert isinstance(array, numpy.memmap) and not array.flags.writeable
+        assert numpy.array_equal(array, getattr(mesh, name))
+
+    # other keys are unaffected
+    assert cache.load(4, 6, 4, "poincare") is None
+    assert cache.load(4, 6, 3, "weierstrass") is None
+
+
+def test_store_existing_key(tmp_path, monkeypatch):
+    monkeypatch.setenv("POST_EUCLID_CACHE", str(tmp_path))
+    cache = TilingCache()
+
+    mesh = TilingMesh.build(5, 4, 2)
+    cache.store(5, 4, 2, "poincare", mesh)
+    loaded = cache.load(5, 4, 2, "poincare")
+
+    # as if another process stored the same tiling first, the stored one stays in place
+    cache.store(5, 4, 2, "poincare", TilingMesh.build(5, 4, 2))
+
+    assert os.listdir(tmp_path) == [os.path.basename(cache.path(5, 4, 2, "poincare"))]
+    assert numpy.array_equal(cache.load(5, 4, 2, "poincare").vertices, mesh.vertices)
+    assert numpy.array_equal(loaded.transforms, mesh.transforms)
+
+
+def test_get_builds_once(tmp_path):
+    cache = TilingCache(str(tmp_path))
+
+    mesh = cache.get(3, 7, 3, "poincare")
+    assert isinstance(mesh.vertices, numpy.memmap)
+
+    modified = os.path.getmtime(os.path.join(cache.path(3, 7, 3, "poincare"), "vertices.npy"))
+    assert numpy.array_equal(cache.get(3, 7, 3, "poincare").polygons, mesh.polygons)
+    assert os.path.getmtime(os.path.join(cache.path(3, 7, 3, "poincare"), "vertices.npy")) == modified
@@ -0,0 +1,48 @@
+import numpy
+
+from post_euclid.hyperbolic_2d.group_tiling import TriangleGroupTiling
+from post_euclid.hyperbolic_2d.poincare.poincare import PoincareHyperbolicModel
+from post_euclid.hyperbolic_2d.scene import Scene
+from post_euclid.hyperbolic_2d.tiling_worker import TilingWorker
+from post_euclid.hyperbolic_2d.vertex_index import VertexIndex
+
+
+def test_append_while_rebasing():
+    scene = Scene(PoincareHyperbolicModel())
+    tool = scene.model.get_transform_tool()
+    tiling = TriangleGroupTiling(4, 6)
+    layers = 5
+
+    # every transform the underlying points were moved by
+    moved = [tool.create_identity()]
+    scene.add_rebase_listener(lambda transform: moved.append(tool.gyro_mult(transform, moved[-1])))
+
+    worker = TilingWorker(scene, tiling, layers, chunk_size=50)
+    worker.start()
+
+    # back and forth, so the points stay near the origin where they can be compared
+    rebases = 0
+    while not worker.done:
+        scene.translate(0.05 if rebases % 2 == 0 else -0.05, 0.02 if rebases % 4 < 2 else -0.02)
+        scene.rebase()
+        rebases += 1
+
+    worker.join()
+    assert rebases > 0
+
+    vertices, polygons = tiling.tile_mesh(tiling.enumerate(layers))
+    assert scene.point_count == len(vertices)
+    assert scene.segment_count == len(numpy.unique(numpy.sort(
+        numpy.stack((polygons, numpy.roll(polygons, -1, axis=1)), axis=2).reshape(-1, 2), axis=1), axis=0))
+
+    # moved back to the tiling's own coordinates every point is one of its vertices
+    points = tool.apply_to_disk_points(tool.get_inverse(moved[-1]), scene.underlying_point_values(
+        numpy.arange(scene.point_count)))
+
+    index = VertexIndex(1e-6)
+    for i, z in enumerate(vertices.tolist()):
+        index.add(z, i)
+
+    found = [index.find(z) for z in points.tolist()]
+    assert None not in found
+    assert len(set(found)) == len(vertices)
@@ -0,0 +1,64 @@
+import math
+
+import numpy
+
+from post_euclid.hyperbolic_2d.vertex_index import VertexIndex, merge_points
+
+
+def _offset(z: complex, distance: float, angle: float) -> complex:
+    # euclidean offset covering the given small hyperbolic distance at z
+    return z + distance / 2 * (1 - abs(z) ** 2) * complex(math.cos(angle), math.sin(angle))
+
+
+def test_find_within_tolerance():
+    tolerance = 1e-6
+    index = VertexIndex(tolerance)
+    z = 0.3 - 0.6j
+    index.add(z, "a")
+
+    for angle in numpy.linspace(0, 2 * math.pi, 16, endpoint=False).tolist():
+        assert index.find(_offset(z, 0.5 * tolerance, angle)) == "a"
+        assert index.find(_offset(z, 2 * tolerance, angle)) is None
+
+    index.remove(z, "a")
+    assert index.find(z) is None and len(index) == 0
+
+
+def test_find_across_cell_boundary():
+    tolerance = 1e-6
+    index = VertexIndex(tolerance)
+
+    # on either side of the cell edges in x and y
+    edge = 123 * tolerance
+    z = complex(edge - 1e-12, -edge - 1e-12)
+    index.add(z, 1)
+
+    # the copies land in the neighbouring cells
+    assert index.find(complex(edge + 1e-12, -edge + 1e-12)) == 1
+    assert index.find_or_add(complex(edge + 1e-12, -edge - 1e-12), lambda: 2) == 1
+    assert index.find_or_add(complex(edge - 1e-12, -edge + 1e-12), lambda: 3) == 1
+    assert len(index) == 1
+
+
+def test_merge_points():
+    tolerance = 1e-6
+    rng = numpy.random.default_rng(0)
+
+    distinct = 0.9 * numpy.sqrt(rng.uniform(0, 1, 50)) * numpy.exp(1j * rng.uniform(0, 2 * math.pi, 50))
+
+    # copies of each point within tolerance, including copies straddling the edges of the rounding grid and
+    # of the index cells
+    grid_edge = numpy.array([(0.5 + 7) * tolerance * 1e-3 + 0j, tolerance * 41 + 0j])
+    distinct = numpy.concatenate((distinct, grid_edge))
+    jitter = numpy.array([0, 1e-13, -1e-13, 1e-13j, -1e-13j, 0.2 * tolerance * (1 + 1j) / 2])
+    points = (distinct[:, None] + jitter[None, :] * (1 - numpy.abs(distinct[:, None]) ** 2)).reshape(-1)
+
+    order = rng.permutation(len(points))
+    merged, mapping = merge_points(points[order], tolerance)
+
+    assert len(merged) == len(distinct)
+
+    groups = mapping[numpy.argsort(order)].reshape(len(distinct), len(jitter))
+    assert (groups == groups[:, :1]).all()
+    assert len(numpy.unique(groups[:, 0])) == len(distinct)
+    assert numpy.abs(merged[mapping] - points[order]).max() < tolerance
@@ -0,0 +1,52 @@
+import math
+
+import numpy
+
+from post_euclid.hyperbolic_2d.weierstrass.weierstrass import WeierstrassHyperbolicModel
+
+_MINKOWSKI = numpy.diag([-1.0, 1.0, 1.0])
+
+
+def _random_points(count: int) -> numpy.ndarray:
+    rng = numpy.random.default_rng(0)
+    return 0.95 * numpy.sqrt(rng.uniform(0, 1, count)) * numpy.exp(1j * rng.uniform(0, 2 * math.pi, count))
+
+
+def test_apply_to_array_matches_point():
+    model = WeierstrassHyperbolicModel()
+    tool = model.get_transform_tool()
+    trsf = tool.gyro_mult(tool.create_translation_like(0.3, -0.2), tool.create_rotation_like(0.7))
+
+    points = _random_points(100)
+    batch = tool.to_disk_points(tool.apply_to_array(trsf, tool.from_disk_points(points)))
+
+    expected = []
+    for z in points.tolist():
+        point = model.get_factory().create_point_at(z.real, z.imag)
+        point.apply_transform(trsf)
+        expected.append(complex(*point.as_poincare_point().xy))
+
+    assert numpy.allclose(batch, expected, rtol=0, atol=1e-12)
+    assert numpy.allclose(tool.apply_to_disk_points(trsf, points), expected, rtol=0, atol=1e-12)
+
+
+def test_normalize_restores_lorentz_condition():
+    tool = WeierstrassHyperbolicModel().get_transform_tool()
+    rng = numpy.random.default_rng(1)
+
+    trsf = tool.create_identity()
+    for _ in range(0, 200):
+        step = tool.gyro_mult(tool.create_translation_like(*rng.uniform(-0.1, 0.1, 2)),
+                              tool.create_rotation_like(rng.uniform(-1, 1)))
+        trsf = tool.gyro_mult(step, trsf)
+
+    drifted = trsf + rng.uniform(-1e-6, 1e-6, (3, 3)) * numpy.abs(trsf).max()
+    assert not numpy.allclose(drifted.T @ _MINKOWSKI @ drifted, _MINKOWSKI, atol=1e-9)
+
+    normalized = tool.normalize(drifted)
+
+    assert numpy.allclose(normalized.T @ _MINKOWSKI @ normalized, _MINKOWSKI, atol=1e-9)
+
+    # the image of the origin is kept
+    origin = numpy.array([[1.0], [0.0], [0.0]])
+    assert numpy.allclose(tool.to_disk_points(normalized @ origin), tool.to_disk_points(drifted @ origin), atol=1e-9)